@@ -7,21 +7,58 @@ Copyright 2021, Hive Nuclei connector
 """
 
 # Import
-from dataclasses import dataclass
-from typing import Optional, List, Dict
-from datetime import datetime
-from re import compile, search, finditer, MULTILINE
-from urllib.parse import urlparse, ParseResult
+from dataclasses import dataclass, field, replace, fields as dataclass_fields
+from collections import OrderedDict
+from typing import (
+    Optional,
+    List,
+    Dict,
+    Union,
+    Set,
+    Tuple,
+    Iterable,
+    Iterator,
+    Callable,
+)
+from datetime import datetime, timezone
+from re import compile
+from urllib.parse import urlparse
 from uuid import UUID
 from hive_library import HiveLibrary
-from hive_library.enum import RecordTypes
+from hive_library.enum import RecordTypes, TaskStates
 from hive_library.rest import HiveRestApi, AuthenticationError
-from socket import gethostbyname, gethostbyaddr, herror
-from ipaddress import IPv4Address, ip_address
+from hive_nuclei.scope import Scope
+from hive_nuclei.target import Target, TargetNormalizer
+from hive_nuclei.resolver import Resolver
+from hive_nuclei.timestamp import Timestamp, decode_console_timestamp
+from ipaddress import (
+    IPv4Address,
+    IPv6Address,
+    IPv4Network,
+    IPv6Network,
+    ip_address,
+    ip_network,
+)
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread, Event
+from queue import Queue, Full, Empty
 from marshmallow import fields, pre_load, post_load, EXCLUDE
 from marshmallow.exceptions import ValidationError
 from marshmallow import Schema as MarshmallowSchema
 from json import loads, JSONDecodeError
+from sys import platform
+from time import sleep, monotonic
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:
+    getrusage = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 # Authorship information
 __author__ = "Vladimir Ivanov"
@@ -34,6 +71,19 @@ __email__ = "ivanov.vladimir.mail@gmail.com"
 __status__ = "Development"
 
 
+def get_peak_rss() -> Optional[int]:
+    """
+    Get peak resident set size of current process
+    :return: None if not supported on this platform or peak RSS in bytes, example: 52428800
+    """
+    if getrusage is None:
+        return None
+    max_rss: int = getrusage(RUSAGE_SELF).ru_maxrss
+    if platform == "darwin":
+        return max_rss
+    return max_rss * 1024
+
+
 @dataclass
 class NucleiData:
     date: Optional[datetime] = None
@@ -46,15 +96,18 @@ class NucleiData:
     description: Optional[str] = None
     type: Optional[str] = None
     host: Optional[str] = None
-    ip: Optional[IPv4Address] = None
+    ip: Union[None, IPv4Address, IPv6Address] = None
     address: Optional[str] = None
     scheme: str = "http"
     port: Optional[int] = None
     matched: Optional[str] = None
     extracted_results: Optional[List[str]] = None
+    hits: Optional[int] = None
+    last_date: Optional[datetime] = None
+    matched_list: Optional[List[str]] = None
 
     class Schema(MarshmallowSchema):
-        date = fields.DateTime(
+        date = Timestamp(
             missing=None,
             data_key="timestamp",
         )
@@ -67,7 +120,7 @@ class NucleiData:
         description = fields.String(missing=None, data_key="info:description")
         type = fields.String(missing=None)
         host = fields.String(missing=None)
-        ip = fields.IPv4(missing=None)
+        ip = fields.IP(missing=None)
         matched = fields.String(missing=None)
         extracted_results = fields.List(fields.String, missing=None)
 
@@ -107,6 +160,266 @@ class NucleiData:
             return NucleiData(**data)
 
 
+# NucleiBatch column names, column order is the same as NucleiData fields order
+NUCLEI_DATA_COLUMNS: Tuple[str, ...] = tuple(
+    data_field.name for data_field in dataclass_fields(NucleiData)
+)
+
+
+@dataclass
+class NucleiBatch:
+    date: List[Optional[datetime]] = field(default_factory=list)
+    template_id: List[Optional[str]] = field(default_factory=list)
+    template_name: List[Optional[str]] = field(default_factory=list)
+    author: List[Optional[str]] = field(default_factory=list)
+    severity: List[str] = field(default_factory=list)
+    tags: List[Optional[str]] = field(default_factory=list)
+    reference: List[Optional[str]] = field(default_factory=list)
+    description: List[Optional[str]] = field(default_factory=list)
+    type: List[Optional[str]] = field(default_factory=list)
+    host: List[Optional[str]] = field(default_factory=list)
+    ip: List[Union[None, IPv4Address, IPv6Address]] = field(default_factory=list)
+    address: List[Optional[str]] = field(default_factory=list)
+    scheme: List[str] = field(default_factory=list)
+    port: List[Optional[int]] = field(default_factory=list)
+    matched: List[Optional[str]] = field(default_factory=list)
+    extracted_results: List[Optional[List[str]]] = field(default_factory=list)
+    hits: List[Optional[int]] = field(default_factory=list)
+    last_date: List[Optional[datetime]] = field(default_factory=list)
+    matched_list: List[Optional[List[str]]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.matched)
+
+    @staticmethod
+    def columns() -> List[str]:
+        """
+        Get column names, column order is the same as NucleiData fields order
+        :return: List of column names, example: ['date', 'template_id', 'template_name', ...]
+        """
+        return list(NUCLEI_DATA_COLUMNS)
+
+    @staticmethod
+    def from_columns(**columns: List) -> "NucleiBatch":
+        """
+        Make batch from columns of the same length, missing columns are filled with NucleiData defaults
+        :param columns: Column values by column names, example:
+        template_id=['apache-version-detect'], matched=['http://server.ispa.cnr.it/']
+        :return: NucleiBatch object, example:
+        NucleiBatch(template_id=['apache-version-detect'], severity=['info'], matched=['http://server.ispa.cnr.it/'], ...)
+        """
+        length: int = len(next(iter(columns.values()), []))
+        for data_field in dataclass_fields(NucleiData):
+            if data_field.name not in columns:
+                columns[data_field.name] = [data_field.default] * length
+        return NucleiBatch(**columns)
+
+    @staticmethod
+    def from_data(data_list: Iterable[NucleiData]) -> "NucleiBatch":
+        """
+        Make columnar batch from NucleiData objects
+        :param data_list: Iterable of NucleiData objects, example:
+        [NucleiData(template_id='apache-version-detect', type='http', matched='http://server.ispa.cnr.it/', ...)]
+        :return: NucleiBatch object, example:
+        NucleiBatch(template_id=['apache-version-detect'], type=['http'], matched=['http://server.ispa.cnr.it/'], ...)
+        """
+        batch: NucleiBatch = NucleiBatch()
+        batch.extend(data_list)
+        return batch
+
+    def append(self, data: NucleiData) -> None:
+        """
+        Append NucleiData object to batch columns
+        :param data: NucleiData object, example: NucleiData(template_id='apache-version-detect', ...)
+        :return: None
+        """
+        self.extend([data])
+
+    def extend(self, data_list: Iterable[NucleiData]) -> None:
+        """
+        Append NucleiData objects to batch columns
+        :param data_list: Iterable of NucleiData objects, example:
+        [NucleiData(template_id='apache-version-detect', type='http', matched='http://server.ispa.cnr.it/', ...)]
+        :return: None
+        """
+        columns: List[Tuple[str, List]] = [
+            (column, getattr(self, column)) for column in NUCLEI_DATA_COLUMNS
+        ]
+        for data in data_list:
+            values: Dict = data.__dict__
+            for column, column_values in columns:
+                column_values.append(values[column])
+
+    def to_data(self) -> List[NucleiData]:
+        """
+        Make NucleiData objects from batch columns
+        :return: List of NucleiData objects, example: [NucleiData(template_id='apache-version-detect', ...)]
+        """
+        return [
+            NucleiData(*row)
+            for row in zip(*[getattr(self, column) for column in NUCLEI_DATA_COLUMNS])
+        ]
+
+    def normalize(self, normalizer: Optional[TargetNormalizer] = None) -> "NucleiBatch":
+        """
+        Parse matched column and set matched, extracted_results, scheme, address and port columns
+        :param normalizer: Target normalizer with memoized targets shared between batches,
+        example: TargetNormalizer(cache_size=4096)
+        :return: This NucleiBatch object, example:
+        NucleiBatch(matched=['http://server.ispa.cnr.it/'], extracted_results=[['Apache/2.4.7 (Ubuntu)']],
+                    scheme=['http'], address=['server.ispa.cnr.it'], port=[80], ...)
+        """
+        # Every distinct matched value is normalized once
+        distinct_matched: Set[Optional[str]] = set(self.matched)
+        if normalizer is None:
+            normalizer = TargetNormalizer(cache_size=len(distinct_matched))
+        normalized: Dict[Optional[str], Target] = {
+            matched: normalizer.normalize(matched) for matched in distinct_matched
+        }
+        targets: List[Target] = [normalized[matched] for matched in self.matched]
+        self.matched = [target.matched for target in targets]
+        self.extracted_results = [
+            [target.extracted] if target.extracted is not None else extracted_results
+            for target, extracted_results in zip(targets, self.extracted_results)
+        ]
+        self.scheme = [
+            target.scheme if target.scheme is not None else data_type
+            for target, data_type in zip(targets, self.type)
+        ]
+        self.address = [
+            (
+                str(ip)
+                if isinstance(ip, (IPv4Address, IPv6Address))
+                else target.address if target.address is not None else address
+            )
+            for target, ip, address in zip(targets, self.ip, self.address)
+        ]
+        self.port = [
+            target.port if target.port is not None else port
+            for target, port in zip(targets, self.port)
+        ]
+        return self
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """
+        Export batch columns to Arrow table, requires pyarrow: pip install hive-nuclei[arrow],
+        ip addresses are stored as strings and timestamps with time zone are converted to UTC
+        :return: pyarrow.Table object
+        """
+        if pyarrow is None:
+            raise ImportError(
+                "Arrow export requires pyarrow, install it: pip install hive-nuclei[arrow]"
+            )
+
+        # Arrow timestamp column has one time zone for all values
+        def timestamps(dates: List[Optional[datetime]]) -> List[Optional[datetime]]:
+            return [
+                (
+                    date.astimezone(timezone.utc).replace(tzinfo=None)
+                    if date is not None and date.tzinfo is not None
+                    else date
+                )
+                for date in dates
+            ]
+
+        arrays: Dict[str, pyarrow.Array] = dict()
+        for column in self.columns():
+            values: List = getattr(self, column)
+            if column in ("date", "last_date"):
+                arrays[column] = pyarrow.array(
+                    timestamps(values), type=pyarrow.timestamp("us")
+                )
+            elif column == "ip":
+                arrays[column] = pyarrow.array(
+                    [str(ip) if ip is not None else None for ip in values],
+                    type=pyarrow.string(),
+                )
+            elif column in ("port", "hits"):
+                arrays[column] = pyarrow.array(values, type=pyarrow.int32())
+            elif column in ("extracted_results", "matched_list"):
+                arrays[column] = pyarrow.array(
+                    values, type=pyarrow.list_(pyarrow.string())
+                )
+            else:
+                arrays[column] = pyarrow.array(values, type=pyarrow.string())
+        return pyarrow.table(arrays)
+
+    def write_parquet(self, path: str) -> None:
+        """
+        Write batch columns to Parquet file, requires pyarrow: pip install hive-nuclei[arrow]
+        :param path: Parquet file path, example: '/tmp/nuclei.parquet'
+        :return: None
+        """
+        table: pyarrow.Table = self.to_arrow()
+        pyarrow.parquet.write_table(table, path)
+
+
+@dataclass
+class ProjectRoute:
+    project_id: UUID
+    networks: List[Union[IPv4Network, IPv6Network]] = field(default_factory=list)
+    hostname_suffixes: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def from_string(route: str) -> "ProjectRoute":
+        """
+        Make project route from string
+        :param route: Route string, example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e:10.0.0.0/8,.corp.com'
+        :return: ProjectRoute object, example:
+        ProjectRoute(project_id=UUID('2b10f974-3215-4a4e-9fb7-04be8ac5202e'),
+                     networks=[IPv4Network('10.0.0.0/8')], hostname_suffixes=['corp.com'])
+        """
+        project_id, _, rules = route.partition(":")
+        project_route: ProjectRoute = ProjectRoute(project_id=UUID(project_id))
+        for rule in rules.split(","):
+            rule = rule.strip()
+            if len(rule) == 0:
+                continue
+            try:
+                project_route.networks.append(ip_network(rule, strict=False))
+            except ValueError:
+                project_route.hostname_suffixes.append(rule.strip(".").lower())
+        if (
+            len(project_route.networks) == 0
+            and len(project_route.hostname_suffixes) == 0
+        ):
+            raise ValueError(f"Route for project: {project_id} has no rules")
+        return project_route
+
+    def match(
+        self,
+        ip: Union[None, IPv4Address, IPv6Address],
+        hostnames: List[str],
+    ) -> bool:
+        """
+        Check host matches this route
+        :param ip: Host ip address, example: IPv4Address('150.145.88.94')
+        :param hostnames: Host names, example: ['server.ispa.cnr.it']
+        :return: True if host ip address in route networks or host name ends with route hostname suffix
+        """
+        if ip is not None:
+            for network in self.networks:
+                if ip in network:
+                    return True
+        for hostname in hostnames:
+            hostname = hostname.lower()
+            for suffix in self.hostname_suffixes:
+                if hostname == suffix or hostname.endswith(f".{suffix}"):
+                    return True
+        return False
+
+
+@dataclass
+class ImportStatus:
+    completed: List[UUID] = field(default_factory=list)
+    failed: List[HiveLibrary.Task] = field(default_factory=list)
+    pending: List[UUID] = field(default_factory=list)
+
+    @property
+    def applied(self) -> bool:
+        return len(self.pending) == 0 and len(self.failed) == 0
+
+
 class HiveNuclei:
     def __init__(
         self,
@@ -119,6 +432,20 @@ class HiveNuclei:
         port_tag: Optional[str] = None,
         auto_tag: bool = False,
         resolve: bool = False,
+        resolve_workers: int = 8,
+        routes: Optional[List[ProjectRoute]] = None,
+        skip_existing: bool = False,
+        max_in_flight: int = 1000,
+        compact_templates: bool = False,
+        aggregate: bool = False,
+        aggregate_limit: int = 20,
+        aggregate_interval: Optional[float] = None,
+        aggregate_cache_size: int = 4096,
+        track_tasks: bool = True,
+        scope: Optional[Scope] = None,
+        target_cache_size: int = 4096,
+        resolver_cache_size: int = 4096,
+        resolver_negative_ttl: float = 300.0,
     ):
         """
         Init HiveNuclei class
@@ -131,13 +458,65 @@ class HiveNuclei:
         :param port_tag: Hive tag for port, example: 'nuclei_port'
         :param auto_tag: Automatically add tag for host and port, tag example: 'nuclei_<nuclei_severity>'
         :param resolve: Resolve host name and ip address
+        :param resolve_workers: Number of threads which make Hive hosts and resolve names while input is streamed,
+        name resolution waits for network, so it is not limited by parse workers, example: 8
+        :param routes: Routes hosts to Hive projects by ip network or host name suffix,
+        hosts which do not match any route are sent to project_id or, if it is not set, skipped and counted
+        in not_routed, example:
+        [ProjectRoute(project_id=UUID('2b10f974-3215-4a4e-9fb7-04be8ac5202e'),
+                      networks=[IPv4Network('10.0.0.0/8')], hostname_suffixes=['corp.com'])]
+        :param skip_existing: Get existing hosts from Hive project once and upload only new records
+        :param max_in_flight: Max number of nuclei data objects and Hive hosts kept between parse, resolve and upload stages
+        :param compact_templates: Upload template tags, reference and description once per project,
+        other records of the same template contain only template id
+        :param aggregate: Fold hits of the same template on the same host and port into one record
+        with hits count, first and last timestamps
+        :param aggregate_limit: Max number of matched urls and extracted results in aggregated record
+        :param aggregate_interval: Seconds after which aggregated records are uploaded while input is streamed,
+        window is uploaded earlier when it holds max_in_flight records, None aggregates the whole input, example: 10.0
+        :param aggregate_cache_size: Max number of aggregated records which totals are kept between windows,
+        record of the same template, host and port is uploaded again with total hits, example: 4096
+        :param track_tasks: Keep ids of created import tasks for wait_for_tasks, disable it in long running imports
+        which never wait for tasks, so task ids are not accumulated
+        :param scope: Scope allow and deny lists, out of scope nuclei data is skipped before resolve and upload,
+        example: Scope(allow=['10.0.0.0/8', '.corp.com'], deny=['.cdn.corp.com'])
+        :param target_cache_size: Max number of memoized nuclei matched targets, example: 4096
+        :param resolver_cache_size: Max number of cached resolved addresses and names, example: 4096
+        :param resolver_negative_ttl: Seconds after which failed name or address lookup is repeated, example: 300.0
         """
         self.host_tag = host_tag
         self.port_tag = port_tag
         self.auto_tag = auto_tag
         self.resolve = resolve
+        self.resolve_workers = resolve_workers
+        self.routes: List[ProjectRoute] = routes if routes is not None else list()
+        self.skip_existing = skip_existing
+        self.max_in_flight = max_in_flight
+        self.track_tasks = track_tasks
+        self._tasks: Dict[UUID, UUID] = dict()
+        self._tasks_lock: Lock = Lock()
+        self.compact_templates = compact_templates
+        self._uploaded_templates: Dict[UUID, Set[str]] = dict()
+        self._uploaded_templates_lock: Lock = Lock()
+        self.aggregate = aggregate
+        self.aggregate_limit = aggregate_limit
+        self.aggregate_interval = aggregate_interval
+        self.aggregate_cache_size = aggregate_cache_size
+        self.scope = scope
+        self.normalizer: TargetNormalizer = TargetNormalizer(
+            cache_size=target_cache_size
+        )
+        self.out_of_scope: int = 0
+        self._out_of_scope_lock: Lock = Lock()
+        self.not_routed: int = 0
+        self._not_routed_lock: Lock = Lock()
+        self.resolver: Resolver = Resolver(
+            cache_size=resolver_cache_size, negative_ttl=resolver_negative_ttl
+        )
+        self._existing_records: Dict[UUID, Set[Tuple[str, Optional[int], str]]] = dict()
+        self._existing_records_lock: Lock = Lock()
         config: HiveLibrary.Config = HiveLibrary.load_config()
-        if config.project_id is None and project_id is None:
+        if config.project_id is None and project_id is None and len(self.routes) == 0:
             print("Hive project id is not set! Please set Hive project id!")
             exit(1)
         else:
@@ -161,7 +540,9 @@ class HiveNuclei:
             exit(3)
 
     @staticmethod
-    def _parse_nuclei_matched(data_list: List[NucleiData]) -> List[NucleiData]:
+    def _parse_nuclei_matched(
+        data_list: List[NucleiData], normalizer: Optional[TargetNormalizer] = None
+    ) -> List[NucleiData]:
         """
         Parse matched field in List of NucleiData objects
         :param data_list: List of NucleiData objects, example:
@@ -169,48 +550,27 @@ class HiveNuclei:
                     template_name=None, author=None, severity='info', tags=None, reference=None, description=None,
                     type='http', host=None, ip=None, address=None, scheme='http', port=None,
                     matched='http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]', extracted_results=None)]
+        :param normalizer: Target normalizer with memoized targets, example: TargetNormalizer(cache_size=4096)
         :return: List of NucleiData objects, example:
         [NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect',
                     template_name=None, author=None, severity='info', tags=None, reference=None, description=None,
                     type='http', host=None, ip=None, address='server.ispa.cnr.it', scheme='http', port=80,
                     matched='http://server.ispa.cnr.it/', extracted_results=['Apache/2.4.7 (Ubuntu)'])]
         """
-        for index in range(len(data_list)):
-            matched: str = data_list[index].matched
-            extracted_search = search(
-                r"^(?P<matched>.*) \[(?P<extracted>.*)\]$", matched
-            )
-            if extracted_search:
-                data_list[index].matched = str(extracted_search.group("matched"))
-                data_list[index].extracted_results = [
-                    str(extracted_search.group("extracted"))
-                ]
-                matched: str = data_list[index].matched
-            urlparse_result: ParseResult = urlparse(matched)
-            if urlparse_result.hostname is not None:
-                data_list[index].scheme = urlparse_result.scheme
-                data_list[index].address = urlparse_result.hostname
-                if urlparse_result.port is None:
-                    if urlparse_result.scheme == "http":
-                        data_list[index].port = 80
-                    elif urlparse_result.scheme == "https":
-                        data_list[index].port = 443
-                    elif urlparse_result.scheme == "ftp":
-                        data_list[index].port = 21
-                else:
-                    data_list[index].port = urlparse_result.port
-            else:
-                data_list[index].scheme = data_list[index].type
-                matched_regex = (
-                    r"^(?P<address>[0-9a-zA-Z.-_:]{3,64}):"
-                    r"(?P<port>[0-9]{1,4}|[1-5][0-9]{4}|6[0-4][0-9]{3}|65[0-4][0-9]{2}|655[0-2][0-9]|6553[0-5])$"
-                )
-                matched_search = search(matched_regex, matched)
-                if matched_search:
-                    data_list[index].address = str(matched_search.group("address"))
-                    data_list[index].port = int(matched_search.group("port"))
-            if isinstance(data_list[index].ip, IPv4Address):
-                data_list[index].address = str(data_list[index].ip)
+        if normalizer is None:
+            normalizer = TargetNormalizer(cache_size=len(data_list))
+        for data in data_list:
+            target: Target = normalizer.normalize(data.matched)
+            data.matched = target.matched
+            if target.extracted is not None:
+                data.extracted_results = [target.extracted]
+            data.scheme = target.scheme if target.scheme is not None else data.type
+            if target.address is not None:
+                data.address = target.address
+            if target.port is not None:
+                data.port = target.port
+            if isinstance(data.ip, (IPv4Address, IPv6Address)):
+                data.address = str(data.ip)
         return data_list
 
     def _parse_nuclei_console_output(self, lines: str) -> List[NucleiData]:
@@ -223,28 +583,72 @@ class HiveNuclei:
                     type='http', host=None, ip=None, address='server.ispa.cnr.it', scheme='http', port=80,
                     matched='http://server.ispa.cnr.it/', extracted_results=['Apache/2.4.7 (Ubuntu)'])]
         """
-        results: List[NucleiData] = list()
+        return list(self._iter_nuclei_console_output(lines.split("\n")))
+
+    def _iter_nuclei_console_output(self, lines: Iterable[str]) -> Iterator[NucleiData]:
+        """
+        Parse nuclei console output line by line
+        :param lines: Iterable of nuclei console output lines, example: open('nuclei_console_output.txt')
+        :return: Iterator of NucleiData objects, example:
+        NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect',
+                   template_name=None, author=None, severity='info', tags=None, reference=None, description=None,
+                   type='http', host=None, ip=None, address='server.ispa.cnr.it', scheme='http', port=80,
+                   matched='http://server.ispa.cnr.it/', extracted_results=['Apache/2.4.7 (Ubuntu)'])
+        """
+        for nuclei_data in self._iter_nuclei_console_records(lines):
+            nuclei_data = self._parse_nuclei_matched(
+                data_list=[nuclei_data], normalizer=self.normalizer
+            )[0]
+            if self._in_scope(nuclei_data):
+                yield nuclei_data
+
+    @staticmethod
+    def _iter_nuclei_console_records(lines: Iterable[str]) -> Iterator[NucleiData]:
+        """
+        Parse nuclei console output line by line without parsing matched field
+        :param lines: Iterable of nuclei console output lines, example: open('nuclei_console_output.txt')
+        :return: Iterator of NucleiData objects, example:
+        NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect',
+                   type='http', severity='info', matched='http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]', ...)
+        """
+        for (
+            date,
+            template_id,
+            data_type,
+            severity,
+            matched,
+        ) in HiveNuclei._iter_nuclei_console_fields(lines):
+            yield NucleiData(
+                date=decode_console_timestamp(date),
+                template_id=template_id,
+                type=data_type,
+                severity=severity,
+                matched=matched,
+            )
+
+    @staticmethod
+    def _iter_nuclei_console_fields(
+        lines: Iterable[str],
+    ) -> Iterator[Tuple[str, str, str, str, str]]:
+        """
+        Match nuclei console output lines
+        :param lines: Iterable of nuclei console output lines, example: open('nuclei_console_output.txt')
+        :return: Iterator of date, template id, type, severity and matched strings, example:
+        ('2021-06-07 12:54:47', 'apache-version-detect', 'http', 'info',
+         'http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]')
+        """
         ansi_escape = compile(r"(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]")
-        ansi_escaped_lines = ansi_escape.sub("", lines)
-        nuclei_output_regex = (
+        nuclei_output_regex = compile(
             r"^\[(?P<date>\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)\] "
             r"\[(?P<template_id>[a-zA-Z0-9-:]{3,32})\] "
             r"\[(?P<type>[a-zA-Z0-9-:]{2,16})\] "
             r"\[(?P<severity>(info|low|medium|high))\] "
             r"(?P<matched>.*)$"
         )
-        matches = finditer(nuclei_output_regex, ansi_escaped_lines, MULTILINE)
-        for match in matches:
-            results.append(
-                NucleiData(
-                    date=datetime.strptime(match.group("date"), "%Y-%m-%d %H:%M:%S"),
-                    template_id=str(match.group("template_id")),
-                    type=str(match.group("type")),
-                    severity=str(match.group("severity")),
-                    matched=str(match.group("matched")),
-                )
-            )
-        return self._parse_nuclei_matched(data_list=results)
+        for line in lines:
+            match = nuclei_output_regex.search(ansi_escape.sub("", line.rstrip("\n")))
+            if match:
+                yield match.group("date", "template_id", "type", "severity", "matched")
 
     def _parse_nuclei_json_output(self, lines: str) -> List[NucleiData]:
         """
@@ -266,19 +670,582 @@ class HiveNuclei:
                     address='150.145.88.94', scheme='http', port=80, matched='http://server.ispa.cnr.it/',
                     extracted_results=['Apache/2.4.7 (Ubuntu)'])]
         """
-        results: List[NucleiData] = list()
-        for line in lines.split("\n"):
+        return list(self._iter_nuclei_json_output(lines.split("\n")))
+
+    def _iter_nuclei_json_output(self, lines: Iterable[str]) -> Iterator[NucleiData]:
+        """
+        Parse nuclei json output line by line
+        :param lines: Iterable of nuclei json output lines, example: open('nuclei_json_output.txt')
+        :return: Iterator of NucleiData objects, example:
+        NucleiData(date=datetime.datetime(2021, 6, 7, 12, 57, 27, 577122, tzinfo=datetime.timezone(datetime.timedelta(seconds=10800), '+0300')),
+                   template_id='apache-version-detect', template_name='Apache Version', author='philippedelteil',
+                   severity='info', tags=None, reference='http://reference.com/reference',
+                   description='Some Apache servers have the version on the response header. The OpenSSL version can be also obtained',
+                   type='http', host='http://server.ispa.cnr.it/', ip=IPv4Address('150.145.88.94'),
+                   address='150.145.88.94', scheme='http', port=80, matched='http://server.ispa.cnr.it/',
+                   extracted_results=['Apache/2.4.7 (Ubuntu)'])
+        """
+        for nuclei_data in self._iter_nuclei_json_records(lines):
+            nuclei_data = self._parse_nuclei_matched(
+                data_list=[nuclei_data], normalizer=self.normalizer
+            )[0]
+            if self._in_scope(nuclei_data):
+                yield nuclei_data
+
+    @staticmethod
+    def _iter_nuclei_json_records(lines: Iterable[str]) -> Iterator[NucleiData]:
+        """
+        Parse nuclei json output line by line without parsing matched field
+        :param lines: Iterable of nuclei json output lines, example: open('nuclei_json_output.txt')
+        :return: Iterator of NucleiData objects, example:
+        NucleiData(template_id='apache-version-detect', type='http', host='http://server.ispa.cnr.it/',
+                   ip=IPv4Address('150.145.88.94'), matched='http://server.ispa.cnr.it/', ...)
+        """
+        nuclei_data_schema: NucleiData.Schema = NucleiData.Schema(unknown=EXCLUDE)
+        for line in lines:
             try:
                 nuclei_data_dict: Dict = loads(line)
-                nuclei_data: NucleiData = NucleiData.Schema(unknown=EXCLUDE).load(
-                    nuclei_data_dict
-                )
-                results.append(nuclei_data)
+                yield nuclei_data_schema.load(nuclei_data_dict)
             except JSONDecodeError:
                 continue
             except ValidationError:
                 continue
-        return self._parse_nuclei_matched(data_list=results)
+
+    def _in_scope(self, data: NucleiData) -> bool:
+        """
+        Check nuclei data is in scope, out of scope nuclei data is counted
+        :param data: NucleiData object, example:
+        NucleiData(template_id='apache-version-detect', type='http', ip=IPv4Address('150.145.88.94'),
+                   address='server.ispa.cnr.it', scheme='http', port=80, matched='http://server.ispa.cnr.it/', ...)
+        :return: True if scope is not set or host ip address and names are in scope
+        """
+        if self.scope is None:
+            return True
+        names: List[Union[None, str, IPv4Address, IPv6Address]] = [
+            data.ip,
+            data.address,
+        ]
+        if data.host is not None:
+            # Malformed host url, example: 'http://[::1/'
+            try:
+                names.append(urlparse(data.host).hostname)
+            except ValueError:
+                pass
+        if self.scope.contains(names):
+            return True
+        with self._out_of_scope_lock:
+            self.out_of_scope += 1
+        return False
+
+    def _resolve_address(
+        self, hostname: Optional[str]
+    ) -> Union[None, IPv4Address, IPv6Address]:
+        """
+        Get host IP address by name, results are cached in bounded resolver cache
+        :param hostname: Host name, example: 'server.ispa.cnr.it'
+        :return: None if name is not resolved or IP address, example: IPv4Address('150.145.88.94')
+        """
+        if hostname is None:
+            return None
+        return self.resolver.address(hostname)
+
+    def _resolve_name(self, address: Union[IPv4Address, IPv6Address]) -> Optional[str]:
+        """
+        Get host name by IP address, results are cached in bounded resolver cache
+        :param address: IP address, example: IPv4Address('150.145.88.94')
+        :return: None if address is not resolved or host name, example: 'server.ispa.cnr.it'
+        """
+        return self.resolver.name(address)
+
+    def _aggregate_nuclei_data(
+        self, data_iterator: Iterable[Optional[NucleiData]]
+    ) -> Iterator[NucleiData]:
+        """
+        Fold hits of the same template on the same host and port into one NucleiData object,
+        objects are produced after the whole input is read or, if aggregate_interval is set,
+        when aggregation window is expired or holds max_in_flight objects, totals are kept between windows
+        in bounded cache, so object changed in the window is produced again with total hits
+        :param data_iterator: Iterable of NucleiData objects, None means input is idle
+        and only expired window is produced, example:
+        [NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='tech-detect', address='150.145.88.94',
+                    port=80, matched='http://server.ispa.cnr.it/', ...),
+         NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 49), template_id='tech-detect', address='150.145.88.94',
+                    port=80, matched='http://server.ispa.cnr.it/index.php', ...)]
+        :return: Iterator of aggregated NucleiData objects, example:
+        NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='tech-detect', address='150.145.88.94',
+                   port=80, matched='http://server.ispa.cnr.it/', hits=2,
+                   last_date=datetime.datetime(2021, 6, 7, 12, 54, 49),
+                   matched_list=['http://server.ispa.cnr.it/', 'http://server.ispa.cnr.it/index.php'], ...)
+        """
+        aggregates: "OrderedDict[Tuple[Optional[str], Optional[int], Optional[str]], NucleiData]" = (OrderedDict())
+        # Keys of aggregates changed in the current window
+        changed: Dict[Tuple[Optional[str], Optional[int], Optional[str]], None] = dict()
+        window_start: float = monotonic()
+        for data in data_iterator:
+            # Produce copies of aggregates changed in expired or full window of streamed input
+            if (
+                self.aggregate_interval is not None
+                and len(changed) > 0
+                and (
+                    len(changed) >= self.max_in_flight
+                    or monotonic() - window_start >= self.aggregate_interval
+                )
+            ):
+                for key in changed:
+                    aggregate: NucleiData = aggregates[key]
+                    yield replace(
+                        aggregate,
+                        matched_list=list(aggregate.matched_list),
+                        extracted_results=(
+                            list(aggregate.extracted_results)
+                            if isinstance(aggregate.extracted_results, List)
+                            else aggregate.extracted_results
+                        ),
+                    )
+                changed = dict()
+                # Forget least recently hit totals which are not changed in the new window
+                while len(aggregates) > self.aggregate_cache_size:
+                    aggregates.popitem(last=False)
+            if data is None:
+                continue
+            key = (data.address, data.port, data.template_id)
+            if len(changed) == 0:
+                window_start = monotonic()
+            changed[key] = None
+            if key not in aggregates:
+                data.hits = 1
+                data.last_date = data.date
+                data.matched_list = [data.matched] if data.matched is not None else []
+                if isinstance(data.extracted_results, List):
+                    data.extracted_results = data.extracted_results[
+                        : self.aggregate_limit
+                    ]
+                aggregates[key] = data
+                continue
+
+            aggregates.move_to_end(key)
+            aggregate: NucleiData = aggregates[key]
+            aggregate.hits += 1
+            if data.date is not None:
+                if aggregate.date is None or data.date < aggregate.date:
+                    aggregate.date = data.date
+                if aggregate.last_date is None or data.date > aggregate.last_date:
+                    aggregate.last_date = data.date
+            if (
+                data.matched is not None
+                and data.matched not in aggregate.matched_list
+                and len(aggregate.matched_list) < self.aggregate_limit
+            ):
+                aggregate.matched_list.append(data.matched)
+            if isinstance(data.extracted_results, List):
+                if aggregate.extracted_results is None:
+                    aggregate.extracted_results = list()
+                for extracted_result in data.extracted_results:
+                    if len(aggregate.extracted_results) >= self.aggregate_limit:
+                        break
+                    if extracted_result not in aggregate.extracted_results:
+                        aggregate.extracted_results.append(extracted_result)
+        for key in changed:
+            yield aggregates[key]
+
+    def _make_hive_host(self, data: NucleiData) -> HiveLibrary.Host:
+        """
+        Make Hive host from nuclei data
+        :param data: NucleiData object, example:
+        NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect',
+                   template_name=None, author=None, severity='info', tags=None, reference=None, description=None,
+                   type='http', host=None, ip=None, address='server.ispa.cnr.it', scheme='http', port=80,
+                   matched='http://server.ispa.cnr.it/', extracted_results=['Apache/2.4.7 (Ubuntu)'])
+        :return: Hive host object, example:
+        HiveLibrary.Host(ip=IPv4Address('150.145.88.94'),
+                         names=[HiveLibrary.Host.Name(hostname='server.ispa.cnr.it')],
+                         ports=[HiveLibrary.Host.Port(port=80, service=HiveLibrary.Host.Port.Service(name='http'),
+                                                      records=[HiveLibrary.Record(name='[info] apache-version-detect: http://server.ispa.cnr.it/',
+                                                                                  tool_name='nuclei',
+                                                                                  record_type='nested',
+                                                                                  value=[ .... ])])])
+        """
+        # Make empty Hive host and port
+        host: HiveLibrary.Host = HiveLibrary.Host()
+        port: HiveLibrary.Host.Port = HiveLibrary.Host.Port()
+
+        # Set tag for host
+        if self.host_tag is not None:
+            host.tags = [HiveLibrary.Tag(name=self.host_tag)]
+        # Set tag for port
+        if self.port_tag is not None:
+            port.tags = [HiveLibrary.Tag(name=self.port_tag)]
+        # Automatically set tag for host and port, example: 'nuclei_high'
+        if self.auto_tag:
+            tag_name: str = f"nuclei_{data.severity}"
+            host.tags = [HiveLibrary.Tag(name=tag_name)]
+            port.tags = [HiveLibrary.Tag(name=tag_name)]
+
+        # Get host IP address
+        host_address: Union[None, IPv4Address, IPv6Address] = None
+        if isinstance(data.ip, (IPv4Address, IPv6Address)):
+            host_address = data.ip
+        else:
+            try:
+                # Convert string IP address to IPv4Address or IPv6Address object
+                host_address = ip_address(data.address)
+            except ValueError:
+                # Get host IP address by name
+                if self.resolve:
+                    host_address = self._resolve_address(data.address)
+                # Set host name
+                host.names = [HiveLibrary.Host.Name(hostname=data.address)]
+
+        # Set Hive host IP address
+        if host_address is not None:
+            # Try to resolve host name by address
+            if self.resolve:
+                if len(host.names) == 0:
+                    hostname: Optional[str] = self._resolve_name(host_address)
+                    if hostname is not None:
+                        host.names = [HiveLibrary.Host.Name(hostname=hostname)]
+
+            # Hive host ip is IPv4 address only, IPv6 address is set as host name
+            if isinstance(host_address, IPv4Address):
+                host.ip = host_address
+            elif str(host_address) not in [name.hostname for name in host.names]:
+                host.names = host.names + [
+                    HiveLibrary.Host.Name(hostname=str(host_address))
+                ]
+
+        # Set Hive record name, aggregated record is named by host address and port
+        matched: Optional[str] = data.matched
+        if data.hits is not None:
+            matched = data.address
+            if data.port is not None:
+                matched = f"{data.address}:{data.port}"
+        if data.template_name is not None:
+            record_name: str = (
+                f"[{data.severity}] {data.template_name} ({data.template_id}): {matched}"
+            )
+        else:
+            record_name: str = f"[{data.severity}] {data.template_id}: {matched}"
+
+        # Make Hive record
+        records: List[HiveLibrary.Record] = [
+            HiveLibrary.Record(
+                name=record_name,
+                tool_name="nuclei",
+                record_type=RecordTypes.NESTED.value,
+                value=list(),
+            )
+        ]
+        # Add template id, records with template metadata can be found by it
+        if self.compact_templates and data.template_id is not None:
+            records[0].value.append(
+                HiveLibrary.Record(
+                    name="Template",
+                    tool_name="nuclei",
+                    record_type=RecordTypes.STRING.value,
+                    value=data.template_id,
+                )
+            )
+        # Make record value
+        for key in [
+            "address",
+            "date",
+            "severity",
+            "type",
+            "tags",
+            "reference",
+            "description",
+            "matched",
+        ]:
+            if data.hits is not None and key in ["date", "matched"]:
+                continue
+            if data.__dict__[key] is not None:
+                records[0].value.append(
+                    HiveLibrary.Record(
+                        name=f"{key.capitalize()}",
+                        tool_name="nuclei",
+                        record_type=RecordTypes.STRING.value,
+                        value=str(data.__dict__[key]),
+                    )
+                )
+        # Add aggregated hits of template
+        if data.hits is not None:
+            records[0].value.append(
+                HiveLibrary.Record(
+                    name="Hits",
+                    tool_name="nuclei",
+                    record_type=RecordTypes.NUMBER.value,
+                    value=data.hits,
+                )
+            )
+            for name, date in [
+                ("First seen", data.date),
+                ("Last seen", data.last_date),
+            ]:
+                if date is not None:
+                    records[0].value.append(
+                        HiveLibrary.Record(
+                            name=name,
+                            tool_name="nuclei",
+                            record_type=RecordTypes.STRING.value,
+                            value=str(date),
+                        )
+                    )
+            if isinstance(data.matched_list, List):
+                records[0].value.append(
+                    HiveLibrary.Record(
+                        name="Matched",
+                        tool_name="nuclei",
+                        record_type=RecordTypes.LIST.value,
+                        value=data.matched_list,
+                    )
+                )
+        if isinstance(data.extracted_results, List):
+            records[0].value.append(
+                HiveLibrary.Record(
+                    name="Extracted results",
+                    tool_name="nuclei",
+                    record_type=RecordTypes.LIST.value,
+                    value=data.extracted_results,
+                )
+            )
+
+        # Add port for Hive host
+        if data.port is not None:
+            # Add created records to port
+            port.port = data.port
+            port.service = HiveLibrary.Host.Port.Service(name=data.scheme)
+            port.records = records
+            host.ports = [port]
+        else:
+            # Add created records to host
+            host.records = records
+
+        return host
+
+    def _route_hive_host(self, data: NucleiData, host: HiveLibrary.Host) -> List[UUID]:
+        """
+        Get Hive projects for host by routes
+        :param data: NucleiData object, example:
+        NucleiData(template_id='apache-version-detect', type='http', address='server.ispa.cnr.it', scheme='http',
+                   port=80, matched='http://server.ispa.cnr.it/', ...)
+        :param host: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :return: List of Hive project identifiers, example: [UUID('2b10f974-3215-4a4e-9fb7-04be8ac5202e')]
+        """
+        project_ids: List[UUID] = list()
+        if len(self.routes) > 0:
+            hostnames: List[str] = [name.hostname for name in host.names]
+            # IPv6 address of host is set as host name
+            host_ip: Union[None, IPv4Address, IPv6Address] = host.ip
+            for hostname in hostnames:
+                if host_ip is not None:
+                    break
+                try:
+                    host_ip = ip_address(hostname)
+                except ValueError:
+                    continue
+            for url in [data.host, data.matched]:
+                if url is not None:
+                    # Skip malformed url, example: 'http://[::1/'
+                    try:
+                        hostname: Optional[str] = urlparse(url).hostname
+                    except ValueError:
+                        continue
+                    if hostname is not None:
+                        hostnames.append(hostname)
+            for route in self.routes:
+                if route.project_id not in project_ids:
+                    if route.match(ip=host_ip, hostnames=hostnames):
+                        project_ids.append(route.project_id)
+        if len(project_ids) == 0:
+            if self.project_id is not None:
+                project_ids.append(self.project_id)
+            else:
+                # Host does not match any route and default project is not set
+                with self._not_routed_lock:
+                    self.not_routed += 1
+        return project_ids
+
+    @staticmethod
+    def _get_record_keys(host: HiveLibrary.Host) -> Set[Tuple[str, Optional[int], str]]:
+        """
+        Get keys of all records in Hive host
+        :param host: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :return: Set of record keys (address, port, record name), example:
+        {('150.145.88.94', 80, '[info] apache-version-detect: http://server.ispa.cnr.it/'),
+         ('server.ispa.cnr.it', 80, '[info] apache-version-detect: http://server.ispa.cnr.it/')}
+        """
+        record_keys: Set[Tuple[str, Optional[int], str]] = set()
+        addresses: List[str] = [name.hostname for name in host.names]
+        if host.ip is not None:
+            addresses.append(str(host.ip))
+        for address in addresses:
+            for record in host.records:
+                record_keys.add((address, None, record.name))
+            for port in host.ports:
+                for record in port.records:
+                    record_keys.add((address, port.port, record.name))
+        for name in host.names:
+            for record in name.records:
+                record_keys.add((name.hostname, None, record.name))
+        return record_keys
+
+    def _get_existing_records(
+        self, project_id: UUID
+    ) -> Set[Tuple[str, Optional[int], str]]:
+        """
+        Get keys of records which already exist in Hive project, hosts are requested only once per project
+        :param project_id: Hive project id, example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e'
+        :return: Set of record keys (address, port, record name), example:
+        {('150.145.88.94', 80, '[info] apache-version-detect: http://server.ispa.cnr.it/')}
+        """
+        with self._existing_records_lock:
+            if project_id not in self._existing_records:
+                existing_records: Set[Tuple[str, Optional[int], str]] = set()
+                hosts: Optional[List[HiveLibrary.Host]] = self.hive_api.get_hosts(
+                    project_id=project_id
+                )
+                if hosts is not None:
+                    for host in hosts:
+                        existing_records.update(self._get_record_keys(host))
+                        for template_id in self._get_record_templates(host):
+                            self._set_template_uploaded(project_id, template_id)
+                self._existing_records[project_id] = existing_records
+            return self._existing_records[project_id]
+
+    @staticmethod
+    def _get_record_templates(host: HiveLibrary.Host) -> Set[str]:
+        """
+        Get ids of templates which metadata is stored in Hive host records
+        :param host: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :return: Set of template ids, example: {'apache-version-detect'}
+        """
+        template_ids: Set[str] = set()
+        records: List[HiveLibrary.Record] = list(host.records)
+        for port in host.ports:
+            records.extend(port.records)
+        for record in records:
+            if not isinstance(record.value, List):
+                continue
+            children: Dict[str, HiveLibrary.Record] = {
+                child.name: child
+                for child in record.value
+                if isinstance(child, HiveLibrary.Record)
+            }
+            if "Template" in children and any(
+                name in children for name in ["Tags", "Reference", "Description"]
+            ):
+                template_ids.add(str(children["Template"].value))
+        return template_ids
+
+    def _set_template_uploaded(self, project_id: UUID, template_id: str) -> None:
+        """
+        Mark template metadata as uploaded to Hive project
+        :param project_id: Hive project id, example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e'
+        :param template_id: Nuclei template id, example: 'apache-version-detect'
+        :return: None
+        """
+        with self._uploaded_templates_lock:
+            self._uploaded_templates.setdefault(project_id, set()).add(template_id)
+
+    @staticmethod
+    def _compact_hive_host(host: HiveLibrary.Host) -> HiveLibrary.Host:
+        """
+        Make copy of Hive host without template tags, reference and description records
+        :param host: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :return: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        """
+
+        def compact(records: List[HiveLibrary.Record]) -> List[HiveLibrary.Record]:
+            return [
+                (
+                    replace(
+                        record,
+                        value=[
+                            child
+                            for child in record.value
+                            if not isinstance(child, HiveLibrary.Record)
+                            or child.name not in ["Tags", "Reference", "Description"]
+                        ],
+                    )
+                    if isinstance(record.value, List)
+                    else record
+                )
+                for record in records
+            ]
+
+        return replace(
+            host,
+            records=compact(host.records),
+            ports=[replace(port, records=compact(port.records)) for port in host.ports],
+        )
+
+    def _create_hive_host(
+        self,
+        project_id: UUID,
+        host: HiveLibrary.Host,
+        data: Optional[NucleiData] = None,
+    ) -> Optional[UUID]:
+        """
+        Create Hive host in project, skip host with existing record if skip_existing is set
+        :param project_id: Hive project id, example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e'
+        :param host: Hive host object, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :param data: NucleiData object the host is made from, example:
+        NucleiData(template_id='apache-version-detect', address='150.145.88.94', port=80, ...)
+        :return: None if host is not created or import task id, example: UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586')
+        """
+        existing_records: Set[Tuple[str, Optional[int], str]] = set()
+        record_keys: Set[Tuple[str, Optional[int], str]] = set()
+        if self.skip_existing:
+            existing_records = self._get_existing_records(project_id)
+            record_keys = self._get_record_keys(host)
+            if not record_keys.isdisjoint(existing_records):
+                return None
+
+        # Template metadata is uploaded only with the first record of template in project
+        template_id: Optional[str] = None
+        if self.compact_templates and data is not None:
+            template_id = data.template_id
+        if template_id is not None:
+            with self._uploaded_templates_lock:
+                if template_id in self._uploaded_templates.get(project_id, set()):
+                    host = self._compact_hive_host(host)
+                    template_id = None
+
+        try:
+            task_id: Optional[UUID] = self.hive_api.create_host(
+                project_id=project_id, host=host
+            )
+        except AssertionError as error:
+            print(f"Assertion Error: {error}")
+            return None
+        if task_id is not None:
+            # Aggregated record is uploaded again with total hits, so only not aggregated record is skipped later
+            if data is None or data.hits is None:
+                existing_records.update(record_keys)
+            if self.track_tasks:
+                with self._tasks_lock:
+                    self._tasks[task_id] = project_id
+            if template_id is not None:
+                self._set_template_uploaded(project_id, template_id)
+        return task_id
+
+    def _create_hive_hosts(
+        self,
+        project_id: UUID,
+        data_hosts: List[Tuple[NucleiData, HiveLibrary.Host]],
+    ) -> List[HiveLibrary.Host]:
+        """
+        Create Hive hosts in project, skip hosts with existing records if skip_existing is set
+        :param project_id: Hive project id, example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e'
+        :param data_hosts: List of NucleiData objects and Hive hosts made from them, example:
+        [(NucleiData(template_id='apache-version-detect', ...), HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...))]
+        :return: List of created Hive hosts, example: [HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)]
+        """
+        hive_hosts: List[HiveLibrary.Host] = list()
+        for data, host in data_hosts:
+            if self._create_hive_host(project_id, host, data) is not None:
+                hive_hosts.append(host)
+        return hive_hosts
 
     def _upload_nuclei_data(
         self, data_list: List[NucleiData]
@@ -313,129 +1280,229 @@ class HiveNuclei:
                           tags=[HiveLibrary.Tag(id=None, uuid=None, name='test_host_tag', parent_id=None,
                                                 base_node_id=None, labels=[], parent_labels=[])])]
         """
-        hive_hosts: List[HiveLibrary.Host] = list()
+        # Fold hits of the same template on the same host and port
+        if self.aggregate:
+            data_list = list(self._aggregate_nuclei_data(data_list))
+
+        # Make Hive hosts and route them to Hive projects
+        project_hosts: Dict[UUID, List[Tuple[NucleiData, HiveLibrary.Host]]] = dict()
         for data in data_list:
-            try:
-                # Make empty Hive host and port
-                host: HiveLibrary.Host = HiveLibrary.Host()
-                port: HiveLibrary.Host.Port = HiveLibrary.Host.Port()
-
-                # Set tag for host
-                if self.host_tag is not None:
-                    host.tags = [HiveLibrary.Tag(name=self.host_tag)]
-                # Set tag for port
-                if self.port_tag is not None:
-                    port.tags = [HiveLibrary.Tag(name=self.port_tag)]
-                # Automatically set tag for host and port, example: 'nuclei_high'
-                if self.auto_tag:
-                    tag_name: str = f"nuclei_{data.severity}"
-                    host.tags = [HiveLibrary.Tag(name=tag_name)]
-                    port.tags = [HiveLibrary.Tag(name=tag_name)]
-
-                # Get host IP address
-                host_address: Optional[IPv4Address] = None
-                if isinstance(data.ip, IPv4Address):
-                    host_address = data.ip
-                else:
-                    try:
-                        # Convert string IP address to IPv4Address object
-                        host_address = ip_address(data.address)
-                    except ValueError:
-                        # Get host IP address by name
-                        if self.resolve:
-                            try:
-                                host_address = ip_address(gethostbyname(data.address))
-                            except herror:
-                                pass
-                            except ValueError:
-                                pass
-                        # Set host name
-                        host.names = [HiveLibrary.Host.Name(hostname=data.address)]
-
-                # Set Hive host IP address
-                if host_address is not None:
-                    host.ip = host_address
-
-                    # Try to resolve host name by address
-                    try:
-                        if self.resolve:
-                            if len(host.names) == 0:
-                                host.names = [
-                                    HiveLibrary.Host.Name(
-                                        hostname=gethostbyaddr(str(host_address))[0]
-                                    )
-                                ]
-                    except herror:
-                        pass
-
-                # Set Hive record name
-                if data.template_name is not None:
-                    record_name: str = f"[{data.severity}] {data.template_name} ({data.template_id}): {data.matched}"
-                else:
-                    record_name: str = (
-                        f"[{data.severity}] {data.template_id}: {data.matched}"
-                    )
+            host: HiveLibrary.Host = self._make_hive_host(data)
+            for project_id in self._route_hive_host(data, host):
+                project_hosts.setdefault(project_id, list()).append((data, host))
 
-                # Make Hive record
-                records: List[HiveLibrary.Record] = [
-                    HiveLibrary.Record(
-                        name=record_name,
-                        tool_name="nuclei",
-                        record_type=RecordTypes.NESTED.value,
-                        value=list(),
-                    )
+        # Create Hive hosts, one upload worker per project
+        hive_hosts: List[HiveLibrary.Host] = list()
+        if len(project_hosts) == 1:
+            for project_id, hosts in project_hosts.items():
+                hive_hosts.extend(self._create_hive_hosts(project_id, hosts))
+        elif len(project_hosts) > 1:
+            with ThreadPoolExecutor(max_workers=len(project_hosts)) as executor:
+                futures = [
+                    executor.submit(self._create_hive_hosts, project_id, hosts)
+                    for project_id, hosts in project_hosts.items()
                 ]
-                # Make record value
-                for key in [
-                    "address",
-                    "date",
-                    "severity",
-                    "type",
-                    "tags",
-                    "reference",
-                    "description",
-                    "matched",
-                ]:
-                    if data.__dict__[key] is not None:
-                        records[0].value.append(
-                            HiveLibrary.Record(
-                                name=f"{key.capitalize()}",
-                                tool_name="nuclei",
-                                record_type=RecordTypes.STRING.value,
-                                value=str(data.__dict__[key]),
-                            )
-                        )
-                if isinstance(data.extracted_results, List):
-                    records[0].value.append(
-                        HiveLibrary.Record(
-                            name="Extracted results",
-                            tool_name="nuclei",
-                            record_type=RecordTypes.LIST.value,
-                            value=data.extracted_results,
+                for future in futures:
+                    hive_hosts.extend(future.result())
+        return hive_hosts
+
+    def _upload_nuclei_stream(
+        self,
+        data_iterators: List[Iterable[NucleiData]],
+        workers: int = 1,
+        stopped: Optional[Event] = None,
+    ) -> Iterator[Tuple[NucleiData, HiveLibrary.Host, UUID]]:
+        """
+        Upload nuclei data to Hive through parse, resolve and upload stages running in threads,
+        resolve stage runs resolve_workers threads if resolve is set,
+        every queue between two stages holds at most max_in_flight objects
+        :param data_iterators: List of iterables of NucleiData objects parsed in parallel, example:
+        [self._iter_nuclei_json_output(open('nuclei_json_output.txt'))]
+        :param workers: Number of parse workers, example: 4
+        :param stopped: Event which is set when pipeline is stopped, blocking data iterators can wait for it
+        :return: Iterator of created Hive hosts with nuclei data and import task id, example:
+        (NucleiData(template_id='apache-version-detect', address='150.145.88.94', port=80, ...),
+         HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...),
+         UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586'))
+        """
+        findings: Queue = Queue(maxsize=self.max_in_flight)
+        results: Queue = Queue(maxsize=self.max_in_flight)
+        if stopped is None:
+            stopped = Event()
+        errors: List[BaseException] = list()
+
+        # Put object to queue, wait for free slot until pipeline is stopped
+        def put(queue: Queue, item) -> bool:
+            while not stopped.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        # Get object from queue, returns None if pipeline is stopped
+        def get(queue: Queue):
+            while not stopped.is_set():
+                try:
+                    return queue.get(timeout=0.1)
+                except Empty:
+                    continue
+            return None
+
+        # Parse stage: read nuclei outputs and put NucleiData objects to findings queue
+        def parse(data_iterator: Iterable[NucleiData]) -> None:
+            try:
+                for data in data_iterator:
+                    if not put(findings, data):
+                        break
+            except BaseException as error:
+                errors.append(error)
+                stopped.set()
+
+        # Parse nuclei outputs with pool of parse workers
+        # Parse workers are daemon threads, so input blocked in reading does not block exit
+        def parse_all() -> None:
+            sources: Iterator[Iterable[NucleiData]] = iter(data_iterators)
+            sources_lock: Lock = Lock()
+
+            def parse_sources() -> None:
+                while not stopped.is_set():
+                    with sources_lock:
+                        data_iterator: Optional[Iterable[NucleiData]] = next(
+                            sources, None
                         )
+                    if data_iterator is None:
+                        break
+                    parse(data_iterator)
+
+            parsers: List[Thread] = [
+                Thread(target=parse_sources, daemon=True)
+                for _ in range(max(1, min(workers, len(data_iterators))))
+            ]
+            try:
+                for parser in parsers:
+                    parser.start()
+                for parser in parsers:
+                    parser.join()
+            finally:
+                put(findings, None)
+
+        # Get NucleiData objects from findings queue until parse stage is finished,
+        # None is produced while input is idle, so aggregation window can expire
+        def parsed() -> Iterator[Optional[NucleiData]]:
+            while not stopped.is_set():
+                try:
+                    data: Optional[NucleiData] = findings.get(timeout=0.1)
+                except Empty:
+                    if self.aggregate and self.aggregate_interval is not None:
+                        yield None
+                    continue
+                if data is None:
+                    break
+                yield data
+
+        # Upload stage: create Hive hosts in project, one upload worker per project
+        def upload(project_id: UUID, hosts: Queue) -> None:
+            try:
+                while True:
+                    item = get(hosts)
+                    if item is None:
+                        break
+                    data, host = item
+                    task_id: Optional[UUID] = self._create_hive_host(
+                        project_id, host, data
                     )
+                    if task_id is not None:
+                        if not put(results, (data, host, task_id)):
+                            break
+            except BaseException as error:
+                errors.append(error)
+                stopped.set()
 
-                # Add port for Hive host
-                if data.port is not None:
-                    # Add created records to port
-                    port.port = data.port
-                    port.service = HiveLibrary.Host.Port.Service(name=data.scheme)
-                    port.records = records
-                    host.ports = [port]
-                else:
-                    # Add created records to host
-                    host.records = records
-
-                # Create Hive host
-                task_id: Optional[UUID] = self.hive_api.create_host(
-                    project_id=self.project_id, host=host
-                )
-                if task_id is not None:
-                    hive_hosts.append(host)
-            except AssertionError as error:
-                print(f"Assertion Error: {error}")
+        # Resolve stage: make Hive hosts and route them to upload workers
+        def resolve() -> None:
+            resolving: Queue = Queue(maxsize=self.max_in_flight)
+            project_hosts: Dict[UUID, Queue] = dict()
+            project_hosts_lock: Lock = Lock()
+            workers: List[Thread] = list()
 
-        return hive_hosts
+            # Get queue of project upload worker, start worker for new project
+            def get_project_hosts(project_id: UUID) -> Queue:
+                with project_hosts_lock:
+                    if project_id not in project_hosts:
+                        project_hosts[project_id] = Queue(maxsize=self.max_in_flight)
+                        worker: Thread = Thread(
+                            target=upload,
+                            args=(project_id, project_hosts[project_id]),
+                            daemon=True,
+                        )
+                        worker.start()
+                        workers.append(worker)
+                    return project_hosts[project_id]
+
+            # Resolve worker: names are resolved in parallel, resolver is thread safe
+            def make_hosts() -> None:
+                try:
+                    while True:
+                        data: Optional[NucleiData] = get(resolving)
+                        if data is None:
+                            break
+                        host: HiveLibrary.Host = self._make_hive_host(data)
+                        for project_id in self._route_hive_host(data, host):
+                            put(get_project_hosts(project_id), (data, host))
+                except BaseException as error:
+                    errors.append(error)
+                    stopped.set()
+
+            resolvers: List[Thread] = [
+                Thread(target=make_hosts, daemon=True)
+                for _ in range(max(1, self.resolve_workers) if self.resolve else 1)
+            ]
+            for resolver in resolvers:
+                resolver.start()
+            try:
+                # Fold hits of the same template on the same host and port
+                data_iterator: Iterable[NucleiData] = parsed()
+                if self.aggregate:
+                    data_iterator = self._aggregate_nuclei_data(data_iterator)
+                for data in data_iterator:
+                    if not put(resolving, data):
+                        break
+            except BaseException as error:
+                errors.append(error)
+                stopped.set()
+            finally:
+                for _ in resolvers:
+                    put(resolving, None)
+                for resolver in resolvers:
+                    resolver.join()
+                for hosts in project_hosts.values():
+                    put(hosts, None)
+                for worker in workers:
+                    worker.join()
+                put(results, None)
+
+        parse_stage: Thread = Thread(target=parse_all, daemon=True)
+        resolve_stage: Thread = Thread(target=resolve, daemon=True)
+        parse_stage.start()
+        resolve_stage.start()
+        finished: bool = False
+        try:
+            while True:
+                result = get(results)
+                if result is None:
+                    break
+                yield result
+            finished = True
+        finally:
+            stopped.set()
+            resolve_stage.join()
+            # Parse stage can be blocked in reading stdin or pipe when pipeline is stopped early
+            if finished:
+                parse_stage.join()
+        if len(errors) > 0:
+            raise errors[0]
 
     def parse_nuclei_console_output(self, lines: str) -> List[HiveLibrary.Host]:
         """
@@ -503,3 +1570,173 @@ class HiveNuclei:
         """
         nuclei_objects = self._parse_nuclei_json_output(lines)
         return self._upload_nuclei_data(nuclei_objects)
+
+    def iter_nuclei_outputs(
+        self,
+        outputs: Iterable[Tuple[Iterable[str], bool]],
+        workers: int = 4,
+        callback: Optional[Callable[[NucleiData, HiveLibrary.Host, UUID], None]] = None,
+    ) -> Iterator[Tuple[NucleiData, HiveLibrary.Host, UUID]]:
+        """
+        Parse several nuclei outputs in parallel and send parsed data to Hive through one upload queue
+        :param outputs: Iterable of nuclei outputs: iterable of lines and json output flag, example:
+        [(open('nuclei_console_output.txt'), False), (open('nuclei_json_output.txt'), True)]
+        :param workers: Number of outputs parsed at the same time, example: 4
+        :param callback: Function called for every created Hive host, example:
+        lambda data, host, task_id: print(data.template_id, host.ip, task_id)
+        :return: Iterator of nuclei data, created Hive host and import task id, example:
+        (NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect', ...),
+         HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...),
+         UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586'))
+        """
+        data_iterators: List[Iterable[NucleiData]] = list()
+        for lines, json_output in outputs:
+            if isinstance(lines, str):
+                lines = lines.split("\n")
+            if json_output:
+                data_iterators.append(self._iter_nuclei_json_output(lines))
+            else:
+                data_iterators.append(self._iter_nuclei_console_output(lines))
+        for result in self._upload_nuclei_stream(data_iterators, workers=workers):
+            if callback is not None:
+                callback(*result)
+            yield result
+
+    def iter_nuclei_console_output(
+        self,
+        lines: Union[str, Iterable[str]],
+        callback: Optional[Callable[[NucleiData, HiveLibrary.Host, UUID], None]] = None,
+    ) -> Iterator[Tuple[NucleiData, HiveLibrary.Host, UUID]]:
+        """
+        Parse nuclei console output line by line and send parsed data to Hive, results are produced while uploading
+        :param lines: Nuclei console output string or iterable of lines, example: open('nuclei_console_output.txt')
+        :param callback: Function called for every created Hive host, example:
+        lambda data, host, task_id: print(data.template_id, host.ip, task_id)
+        :return: Iterator of nuclei data, created Hive host and import task id, example:
+        (NucleiData(date=datetime.datetime(2021, 6, 7, 12, 54, 47), template_id='apache-version-detect', ...),
+         HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...),
+         UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586'))
+        """
+        return self.iter_nuclei_outputs([(lines, False)], workers=1, callback=callback)
+
+    def iter_nuclei_json_output(
+        self,
+        lines: Union[str, Iterable[str]],
+        callback: Optional[Callable[[NucleiData, HiveLibrary.Host, UUID], None]] = None,
+    ) -> Iterator[Tuple[NucleiData, HiveLibrary.Host, UUID]]:
+        """
+        Parse nuclei json output line by line and send parsed data to Hive, results are produced while uploading
+        :param lines: Nuclei json output string or iterable of lines, example: open('nuclei_json_output.txt')
+        :param callback: Function called for every created Hive host, example:
+        lambda data, host, task_id: print(data.template_id, host.ip, task_id)
+        :return: Iterator of nuclei data, created Hive host and import task id, example:
+        (NucleiData(date=datetime.datetime(2021, 6, 7, 12, 57, 27, 577122, tzinfo=...),
+                    template_id='apache-version-detect', ...),
+         HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...),
+         UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586'))
+        """
+        return self.iter_nuclei_outputs([(lines, True)], workers=1, callback=callback)
+
+    def read_nuclei_batch(
+        self, lines: Union[str, Iterable[str]], json_output: bool = True
+    ) -> NucleiBatch:
+        """
+        Parse nuclei output into columnar batch without sending it to Hive,
+        matched column is parsed once for the whole batch
+        :param lines: Nuclei output string or iterable of lines, example: open('nuclei_json_output.txt')
+        :param json_output: Nuclei output is json
+        :return: NucleiBatch object, example:
+        NucleiBatch(template_id=['apache-version-detect'], address=['150.145.88.94'], port=[80], ...)
+        """
+        if isinstance(lines, str):
+            lines = lines.split("\n")
+        if json_output:
+            batch: NucleiBatch = NucleiBatch.from_data(
+                self._iter_nuclei_json_records(lines)
+            )
+        else:
+            # Console output columns are made directly from matched lines
+            columns: List[List[str]] = [list(), list(), list(), list(), list()]
+            for values in self._iter_nuclei_console_fields(lines):
+                for column, value in zip(columns, values):
+                    column.append(value)
+            batch = NucleiBatch.from_columns(
+                date=[decode_console_timestamp(date) for date in columns[0]],
+                template_id=columns[1],
+                type=columns[2],
+                severity=columns[3],
+                matched=columns[4],
+            )
+        batch.normalize(self.normalizer)
+        if self.scope is None:
+            return batch
+        return NucleiBatch.from_data(
+            data for data in batch.to_data() if self._in_scope(data)
+        )
+
+    def wait_for_tasks(
+        self,
+        timeout: float = 600.0,
+        concurrency: int = 8,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+    ) -> ImportStatus:
+        """
+        Wait until all Hive import tasks created by this object are completed, tasks are tracked if track_tasks is set,
+        statuses of pending tasks are polled in rounds with bounded concurrency and exponential backoff
+        :param timeout: Max time to wait in seconds, example: 600.0
+        :param concurrency: Max number of concurrent task status requests, example: 8
+        :param poll_interval: Initial delay between polling rounds in seconds, example: 1.0
+        :param max_poll_interval: Max delay between polling rounds in seconds, example: 30.0
+        :return: Import status, example:
+        ImportStatus(completed=[UUID('d2ac8146-d9a8-4b38-86b9-b31f20997586')],
+                     failed=[HiveLibrary.Task(id=UUID('4ebfb427-f570-4f8c-b6ca-b854c6f46f0d'), state='FAILED', ...)],
+                     pending=[])
+        """
+        import_status: ImportStatus = ImportStatus()
+        deadline: float = monotonic() + timeout
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                with self._tasks_lock:
+                    tasks: List[Tuple[UUID, UUID]] = list(self._tasks.items())
+                if len(tasks) == 0:
+                    break
+
+                # Get states of all pending tasks
+                hive_tasks: List[Optional[HiveLibrary.Task]] = list(
+                    executor.map(
+                        lambda task: self.hive_api.get_task(
+                            project_id=task[1], task_id=task[0]
+                        ),
+                        tasks,
+                    )
+                )
+                for (task_id, project_id), task in zip(tasks, hive_tasks):
+                    if task is None:
+                        continue
+                    if task.state == TaskStates.SUCCESS.value:
+                        import_status.completed.append(task_id)
+                    elif task.state in [
+                        TaskStates.FAILURE.value,
+                        TaskStates.CANCELLED.value,
+                    ]:
+                        if task.id is None:
+                            task.id = task_id
+                        import_status.failed.append(task)
+                    else:
+                        continue
+                    with self._tasks_lock:
+                        del self._tasks[task_id]
+
+                # Wait before next polling round, the last round is made at deadline
+                with self._tasks_lock:
+                    pending: int = len(self._tasks)
+                delay: float = min(poll_interval, deadline - monotonic())
+                if pending == 0 or delay <= 0:
+                    break
+                sleep(delay)
+                poll_interval = min(poll_interval * 2, max_poll_interval)
+
+        with self._tasks_lock:
+            import_status.pending = list(self._tasks.keys())
+        return import_status
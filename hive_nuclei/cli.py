@@ -8,12 +8,19 @@ Copyright 2021, Hive Nuclei connector
 
 # Import
 from sys import stdin
-from hive_nuclei import HiveNuclei
-from argparse import ArgumentParser
+from os import walk
+from os.path import getsize, isdir, isfile, join
+from glob import glob
+from subprocess import Popen, PIPE
+from signal import signal, SIGTERM
+from hive_nuclei import HiveNuclei, ProjectRoute, ImportStatus
+from hive_nuclei.scope import Scope
+from hive_nuclei.reporter import Reporter, format_hive_host, QUIET, HOSTS
+from hive_nuclei.service import NucleiService
+from argparse import ArgumentParser, REMAINDER
 from uuid import UUID
-from typing import List, Union, Optional
+from typing import List, Tuple, Optional, Iterable, Iterator
 from hive_library import HiveLibrary
-from ipaddress import IPv4Address
 from colorama import Fore, Style
 
 # Authorship information
@@ -26,48 +33,129 @@ __maintainer__ = "Vladimir Ivanov"
 __email__ = "ivanov.vladimir.mail@gmail.com"
 __status__ = "Development"
 
+# Nuclei arguments which enable json output
+NUCLEI_JSON_ARGUMENTS: Tuple[str, ...] = ("-json", "--json", "-jsonl", "--jsonl", "-j")
+
 
 # Colored print hive import results in console
-def print_hive_hosts(hosts: List[HiveLibrary.Host]) -> None:
+def print_hive_hosts(hosts: Iterable[HiveLibrary.Host]) -> None:
     for host in hosts:
-        host_address: Union[None, IPv4Address, str] = None
-        record_name: Optional[str] = None
-        if host.ip is not None:
-            host_address = str(host.ip)
+        print(format_hive_host(host))
+
+
+# Colored print hive import tasks status in console
+def print_import_status(import_status: ImportStatus) -> None:
+    for task in import_status.failed:
+        print(
+            f"[{Fore.RED}ERR{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
+            f"{Style.BRIGHT}Import task failed:{Style.RESET_ALL} {task.id} "
+            f"state: {task.state} error: {task.exc_message}"
+        )
+    for task_id in import_status.pending:
+        print(
+            f"[{Fore.YELLOW}WRN{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
+            f"{Style.BRIGHT}Import task is not completed:{Style.RESET_ALL} {task_id}"
+        )
+    if import_status.applied:
+        print(
+            f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
+            f"{Style.BRIGHT}Import is fully applied:{Style.RESET_ALL} "
+            f"{len(import_status.completed)} tasks completed"
+        )
+
+
+# Get nuclei output files by file names, directories and glob patterns,
+# files in directories are skipped if they are not nuclei output
+def get_nuclei_output_files(patterns: List[str], reporter: Reporter) -> List[str]:
+    file_names: List[str] = list()
+    for pattern in patterns:
+        if isdir(pattern):
+            for directory, _, names in walk(pattern):
+                for name in sorted(names):
+                    file_name: str = join(directory, name)
+                    if get_nuclei_output_format(file_name) is not None:
+                        file_names.append(file_name)
+        elif isfile(pattern):
+            file_names.append(pattern)
         else:
-            if len(host.names) == 1:
-                host_address = host.names[0].hostname
-        if len(host.records) == 1:
-            record_name = host.records[0].name
-        elif len(host.ports) == 1:
-            host_address += f":{host.ports[0].port}"
-            if len(host.ports[0].records) == 1:
-                record_name = host.ports[0].records[0].name
-        if host_address is not None and record_name is not None:
-            print(
-                f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
-                f"{Style.BRIGHT}Making Hive record:{Style.RESET_ALL} {record_name} "
-                f"{Style.BRIGHT}for host:{Style.RESET_ALL} {host_address} "
-                f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
-            )
-        elif host_address is not None:
-            print(
-                f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
-                f"{Style.BRIGHT}Making Hive host:{Style.RESET_ALL} {host_address} "
-                f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
-            )
-        elif record_name is not None:
-            print(
-                f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
-                f"{Style.BRIGHT}Making Hive record:{Style.RESET_ALL} {record_name} "
-                f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
-            )
+            matched_file_names: List[str] = [
+                file_name
+                for file_name in sorted(glob(pattern, recursive=True))
+                if isfile(file_name)
+            ]
+            if len(matched_file_names) == 0:
+                reporter.error(f"Not found file: {pattern} with nuclei output")
+            file_names.extend(matched_file_names)
+    return file_names
+
+
+# Detect nuclei output format by first not empty line,
+# returns True for json, False for console output and None if format is not detected
+def get_nuclei_output_format(file_name: str) -> Optional[bool]:
+    try:
+        with open(file_name, "r") as nuclei_output_file:
+            for line in nuclei_output_file:
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                if line.startswith("{"):
+                    return True
+                if line.startswith("[") or line.startswith("\x1b["):
+                    return False
+                return None
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
+# Detect nuclei output format, console output is default
+def is_nuclei_json_output(file_name: str) -> bool:
+    return get_nuclei_output_format(file_name) is True
+
+
+# Read nuclei output file line by line, file is opened when the first line is requested
+def read_nuclei_output_file(file_name: str, reporter: Reporter) -> Iterator[str]:
+    try:
+        with open(file_name, "r") as nuclei_output_file:
+            for line in nuclei_output_file:
+                yield line
+    except (OSError, UnicodeDecodeError) as error:
+        reporter.error(f"Failed to read file: {file_name} with nuclei output: {error}")
+
+
+# Get scope rules from arguments, argument is a rule or a file with one rule per line
+def get_scope_rules(arguments: Optional[List[str]]) -> List[str]:
+    rules: List[str] = list()
+    for argument in arguments or list():
+        if isfile(argument):
+            with open(argument, "r") as rules_file:
+                rules.extend(rules_file.read().splitlines())
         else:
-            print(
-                f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
-                f"{Style.BRIGHT}Failed to import nuclei data in Hive{Style.RESET_ALL} "
-                f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
-            )
+            rules.extend(argument.split(","))
+    return rules
+
+
+# Stop service on SIGTERM like on Ctrl+C, queued nuclei data is uploaded before exit
+def interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+# Get shell exit code of process, process killed by signal exits with 128 + signal number
+def get_exit_code(return_code: int) -> int:
+    if return_code < 0:
+        return 128 - return_code
+    return return_code
+
+
+# Start nuclei child process, json output is read from its stdout pipe
+def start_nuclei(nuclei_path: str, nuclei_arguments: List[str]) -> Popen:
+    if not any(argument in NUCLEI_JSON_ARGUMENTS for argument in nuclei_arguments):
+        nuclei_arguments = nuclei_arguments + ["-json"]
+    return Popen(
+        [nuclei_path] + nuclei_arguments,
+        stdout=PIPE,
+        universal_newlines=True,
+    )
 
 
 # Main function
@@ -108,6 +196,57 @@ def main() -> None:
         action="store_true",
         help="Do not resolve hostname",
     )
+    parser.add_argument(
+        "-rw",
+        "--resolve_workers",
+        type=int,
+        help="Number of threads which resolve host names and addresses",
+        default=8,
+    )
+    parser.add_argument(
+        "-r",
+        "--route",
+        type=ProjectRoute.from_string,
+        action="append",
+        help="route hosts to project by networks and hostname suffixes, "
+        "example: '2b10f974-3215-4a4e-9fb7-04be8ac5202e:10.0.0.0/8,.corp.com'",
+        default=None,
+    )
+    parser.add_argument(
+        "-se",
+        "--skip_existing",
+        action="store_true",
+        help="Do not upload records which already exist in Hive project",
+    )
+
+    parser.add_argument(
+        "-ct",
+        "--compact_templates",
+        action="store_true",
+        help="Upload template tags, reference and description once per project",
+    )
+
+    parser.add_argument(
+        "-ag",
+        "--aggregate",
+        action="store_true",
+        help="Fold hits of the same template on the same host and port into one record",
+    )
+    parser.add_argument(
+        "-al",
+        "--aggregate_limit",
+        type=int,
+        help="Max number of matched urls and extracted results in aggregated record",
+        default=20,
+    )
+    parser.add_argument(
+        "-ai",
+        "--aggregate_interval",
+        type=float,
+        help="Seconds after which aggregated records are uploaded, "
+        "default: whole input for files and stdin, 10 for run and serve commands",
+        default=None,
+    )
 
     # Parsers
     parser.add_argument(
@@ -120,14 +259,77 @@ def main() -> None:
         "-cf",
         "--console_file",
         type=str,
-        help="Read and parse nuclei console output file",
+        nargs="+",
+        help="Read and parse nuclei console output files, directories or glob patterns",
         default=None,
     )
     parser.add_argument(
         "-jf",
         "--json_file",
         type=str,
-        help="Read and parse nuclei json output file",
+        nargs="+",
+        help="Read and parse nuclei json output files, directories or glob patterns",
+        default=None,
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        nargs="+",
+        help="Read and parse nuclei output files, directories or glob patterns, "
+        "output format is detected for every file",
+        default=None,
+    )
+    parser.add_argument(
+        "-fw",
+        "--file_workers",
+        type=int,
+        help="Number of nuclei output files parsed at the same time",
+        default=4,
+    )
+
+    # Memory
+    parser.add_argument(
+        "-m",
+        "--max_in_flight",
+        type=int,
+        help="Keep at most this number of findings and hosts between parse, "
+        "resolve and upload stages",
+        default=1000,
+    )
+
+    # Import tasks
+    parser.add_argument(
+        "-w",
+        "--wait",
+        action="store_true",
+        help="Wait until Hive applies all import tasks and print failed tasks",
+    )
+    parser.add_argument(
+        "-wt",
+        "--wait_timeout",
+        type=float,
+        help="Max time to wait for import tasks in seconds",
+        default=600.0,
+    )
+
+    # Scope
+    parser.add_argument(
+        "-sa",
+        "--scope_allow",
+        type=str,
+        nargs="+",
+        help="Import only hosts in these networks, IP addresses or host name suffixes, "
+        "example: 10.0.0.0/8 .corp.com or a file with one rule per line",
+        default=None,
+    )
+    parser.add_argument(
+        "-sd",
+        "--scope_deny",
+        type=str,
+        nargs="+",
+        help="Skip hosts in these networks, IP addresses or host name suffixes, "
+        "example: 10.0.0.1 .cdn.corp.com or a file with one rule per line",
         default=None,
     )
 
@@ -135,9 +337,73 @@ def main() -> None:
     parser.add_argument(
         "-q", "--quiet", action="store_true", help="Do not print in console"
     )
+    parser.add_argument(
+        "-v",
+        "--verbosity",
+        type=int,
+        choices=[0, 1, 2, 3],
+        help="0 - quiet, 1 - final summary, 2 - progress and periodic summaries, "
+        "3 - line for every created Hive host",
+        default=HOSTS,
+    )
+    parser.add_argument(
+        "-ri",
+        "--report_interval",
+        type=float,
+        help="Interval between progress reports in seconds",
+        default=10.0,
+    )
+    parser.add_argument(
+        "-e", "--echo", action="store_true", help="Print nuclei output in console"
+    )
 
     # Proxy
     parser.add_argument("-p", "--proxy", type=str, help="Set proxy URL", default=None)
+
+    # Run nuclei
+    parser.add_argument(
+        "-np",
+        "--nuclei_path",
+        type=str,
+        help="Path to nuclei executable for run command",
+        default="nuclei",
+    )
+    commands = parser.add_subparsers(dest="command")
+    run_parser: ArgumentParser = commands.add_parser(
+        "run",
+        prefix_chars="+",
+        help="Run nuclei and import its json output while it is running, "
+        "all arguments after run are passed to nuclei",
+    )
+    run_parser.add_argument(
+        "nuclei_arguments",
+        nargs=REMAINDER,
+        help="Nuclei arguments, example: -t technologies/ -target http://example.com",
+    )
+    serve_parser: ArgumentParser = commands.add_parser(
+        "serve",
+        help="Run local service which imports nuclei outputs sent by HTTP POST or PUT to /json or /console",
+    )
+    serve_parser.add_argument(
+        "-l",
+        "--listen",
+        type=str,
+        help="TCP address to listen, default: 127.0.0.1:8090 if unix socket is not set",
+        default=None,
+    )
+    serve_parser.add_argument(
+        "-us",
+        "--unix_socket",
+        type=str,
+        help="Unix socket path to listen, example: /tmp/hive-nuclei.sock",
+        default=None,
+    )
+    serve_parser.add_argument(
+        "-ar",
+        "--allow_remote",
+        action="store_true",
+        help="Allow to listen not loopback TCP address, service does not authenticate requests",
+    )
     args = parser.parse_args()
     # endregion
 
@@ -152,55 +418,156 @@ def main() -> None:
         port_tag=args.port_tag,
         auto_tag=args.auto_tag,
         resolve=not args.not_resolve,
+        resolve_workers=args.resolve_workers,
+        max_in_flight=args.max_in_flight,
+        routes=args.route,
+        skip_existing=args.skip_existing,
+        compact_templates=args.compact_templates,
+        aggregate=args.aggregate,
+        aggregate_limit=args.aggregate_limit,
+        aggregate_interval=(
+            10.0
+            if args.aggregate_interval is None and args.command is not None
+            else args.aggregate_interval
+        ),
+        # Long running service never waits for import tasks
+        track_tasks=args.wait and args.command != "serve",
+        scope=(
+            Scope(
+                allow=get_scope_rules(args.scope_allow),
+                deny=get_scope_rules(args.scope_deny),
+            )
+            if args.scope_allow is not None or args.scope_deny is not None
+            else None
+        ),
     )
 
-    # Parse nuclei console output file
-    if args.console_file is not None:
-        try:
-            with open(args.console_file, "r") as console_file:
-                nuclei_output = console_file.read()
-            print(nuclei_output)
-            hosts: List[HiveLibrary.Host] = hive_nuclei.parse_nuclei_console_output(
-                lines=nuclei_output
-            )
-            if not args.quiet:
-                print_hive_hosts(hosts=hosts)
-        except FileNotFoundError:
-            print(f"Not found file: {args.console_file} with nuclei console output")
+    # Get nuclei output files and formats
+    reporter: Reporter = Reporter(
+        verbosity=QUIET if args.quiet else args.verbosity,
+        interval=args.report_interval,
+    )
+    nuclei_output_files: List[Tuple[str, bool]] = list()
+    for file_name in get_nuclei_output_files(args.console_file or list(), reporter):
+        nuclei_output_files.append((file_name, False))
+    for file_name in get_nuclei_output_files(args.json_file or list(), reporter):
+        nuclei_output_files.append((file_name, True))
+    for file_name in get_nuclei_output_files(args.input or list(), reporter):
+        nuclei_output_files.append((file_name, is_nuclei_json_output(file_name)))
+    read_stdin: bool = (
+        args.command is None
+        and args.console_file is None
+        and args.json_file is None
+        and args.input is None
+    )
+    if args.command is None and not read_stdin and len(nuclei_output_files) == 0:
+        reporter.flush()
+        return
 
-    # Parse nuclei json output file
-    elif args.json_file is not None:
+    # Parse nuclei outputs line by line and send parsed data to Hive
+    if not read_stdin and args.command is None:
+        reporter.total_bytes = sum(
+            getsize(file_name) for file_name, _ in nuclei_output_files
+        )
+    reporter.total_files = len(nuclei_output_files)
+    nuclei_process: Optional[Popen] = None
+    nuclei_service: Optional[NucleiService] = None
+    if args.command == "serve":
+        # Service uploads nuclei data from all requests until it is interrupted
+        nuclei_service = NucleiService(hive_nuclei=hive_nuclei, reporter=reporter)
+        listen: Optional[str] = args.listen
+        if listen is None and args.unix_socket is None:
+            listen = "127.0.0.1:8090"
+        reporter.info(
+            "Listening: "
+            + ", ".join(address for address in [listen, args.unix_socket] if address)
+        )
+        reporter.flush()
+        signal(SIGTERM, interrupt)
         try:
-            with open(args.json_file, "r") as json_file:
-                nuclei_output = json_file.read()
-            print(nuclei_output)
-            hosts: List[HiveLibrary.Host] = hive_nuclei.parse_nuclei_json_output(
-                lines=nuclei_output
+            nuclei_service.serve(
+                address=listen,
+                unix_socket=args.unix_socket,
+                allow_remote=args.allow_remote,
             )
-            if not args.quiet:
-                print_hive_hosts(hosts=hosts)
-        except FileNotFoundError:
-            print(f"Not found file: {args.console_file} with nuclei json output")
-
-    # Parse nuclei json output
-    elif args.json_output:
-        nuclei_output = stdin.read()
-        print(nuclei_output)
-        hosts: List[HiveLibrary.Host] = hive_nuclei.parse_nuclei_json_output(
-            lines=nuclei_output
+        except KeyboardInterrupt:
+            pass
+        except (OSError, ValueError) as error:
+            reporter.info(f"Failed to start service: {error}")
+            reporter.flush()
+            exit(2)
+        results = list()
+    elif args.command == "run":
+        try:
+            nuclei_process = start_nuclei(args.nuclei_path, args.nuclei_arguments)
+        except OSError as error:
+            print(f"Failed to run nuclei: {args.nuclei_path}: {error}")
+            exit(127)
+        results = hive_nuclei.iter_nuclei_outputs(
+            [(reporter.read_lines(nuclei_process.stdout, echo=args.echo), True)],
+            workers=1,
+        )
+    elif read_stdin:
+        results = hive_nuclei.iter_nuclei_outputs(
+            [(reporter.read_lines(stdin, echo=args.echo), args.json_output)],
+            workers=1,
         )
-        if not args.quiet:
-            print_hive_hosts(hosts=hosts)
-
-    # By default parse nuclei console output
     else:
-        nuclei_output = stdin.read()
-        print(nuclei_output)
-        hosts: List[HiveLibrary.Host] = hive_nuclei.parse_nuclei_console_output(
-            lines=nuclei_output
+        results = hive_nuclei.iter_nuclei_outputs(
+            [
+                (
+                    reporter.read_lines(
+                        read_nuclei_output_file(file_name, reporter),
+                        echo=args.echo,
+                        name=file_name,
+                        size=getsize(file_name),
+                    ),
+                    json_output,
+                )
+                for file_name, json_output in nuclei_output_files
+            ],
+            workers=args.file_workers,
+        )
+    nuclei_return_code: int = 0
+    try:
+        for data, host, _ in results:
+            reporter.add_host(data, host)
+    except BaseException:
+        # Stop nuclei if import failed or interrupted
+        if nuclei_process is not None and nuclei_process.poll() is None:
+            nuclei_process.terminate()
+        raise
+    finally:
+        if nuclei_process is not None:
+            nuclei_process.stdout.close()
+            nuclei_return_code = get_exit_code(nuclei_process.wait())
+    if hive_nuclei.out_of_scope > 0:
+        reporter.info(f"Skipped out of scope findings: {hive_nuclei.out_of_scope}")
+    if hive_nuclei.not_routed > 0:
+        reporter.info(
+            f"Skipped findings which match no route: {hive_nuclei.not_routed}"
+        )
+    if nuclei_return_code != 0:
+        reporter.info(f"Nuclei exited with code: {nuclei_return_code}")
+    reporter.summary()
+
+    # Wait until Hive applies all import tasks
+    if args.wait:
+        import_status: ImportStatus = hive_nuclei.wait_for_tasks(
+            timeout=args.wait_timeout
         )
-        if not args.quiet:
-            print_hive_hosts(hosts=hosts)
+        if not args.quiet and args.verbosity > QUIET:
+            print_import_status(import_status=import_status)
+        if not import_status.applied and nuclei_return_code == 0:
+            exit(4)
+
+    # Exit if service failed to upload nuclei data
+    if nuclei_service is not None and nuclei_service.error is not None:
+        exit(5)
+
+    # Exit with nuclei exit code
+    if nuclei_return_code != 0:
+        exit(nuclei_return_code)
 
 
 # Run main function
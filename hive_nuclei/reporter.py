@@ -0,0 +1,318 @@
+# Description
+"""
+Hive Nuclei connector console reporter
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from sys import stdout
+from time import monotonic
+from threading import Lock
+from typing import List, Dict, Optional, Union, Iterable, Iterator, TextIO
+from ipaddress import IPv4Address
+from hive_library import HiveLibrary
+from hive_nuclei import NucleiData, get_peak_rss
+from colorama import Fore, Style
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Verbosity levels
+QUIET: int = 0
+SUMMARY: int = 1
+PROGRESS: int = 2
+HOSTS: int = 3
+
+
+# Make colored console line
+def format_info(message: str) -> str:
+    return (
+        f"[{Fore.BLUE}INF{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
+        f"{message}"
+    )
+
+
+# Make colored console error line
+def format_error(message: str) -> str:
+    return (
+        f"[{Fore.RED}ERR{Fore.RESET}] [{Fore.LIGHTBLUE_EX}hive-nuclei{Fore.RESET}] "
+        f"{message}"
+    )
+
+
+# Make colored console line for hive import result
+def format_hive_host(host: HiveLibrary.Host) -> str:
+    host_address: Union[None, IPv4Address, str] = None
+    record_name: Optional[str] = None
+    if host.ip is not None:
+        host_address = str(host.ip)
+    else:
+        if len(host.names) == 1:
+            host_address = host.names[0].hostname
+    if len(host.records) == 1:
+        record_name = host.records[0].name
+    elif len(host.ports) == 1:
+        host_address += f":{host.ports[0].port}"
+        if len(host.ports[0].records) == 1:
+            record_name = host.ports[0].records[0].name
+    if host_address is not None and record_name is not None:
+        return format_info(
+            f"{Style.BRIGHT}Making Hive record:{Style.RESET_ALL} {record_name} "
+            f"{Style.BRIGHT}for host:{Style.RESET_ALL} {host_address} "
+            f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
+        )
+    elif host_address is not None:
+        return format_info(
+            f"{Style.BRIGHT}Making Hive host:{Style.RESET_ALL} {host_address} "
+            f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
+        )
+    elif record_name is not None:
+        return format_info(
+            f"{Style.BRIGHT}Making Hive record:{Style.RESET_ALL} {record_name} "
+            f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
+        )
+    else:
+        return format_info(
+            f"{Style.BRIGHT}Failed to import nuclei data in Hive{Style.RESET_ALL} "
+            f"({Fore.LIGHTYELLOW_EX}@_generic_human_{Fore.RESET}) [{Fore.BLUE}info{Fore.RESET}]"
+        )
+
+
+class Reporter:
+    def __init__(
+        self,
+        verbosity: int = HOSTS,
+        interval: float = 10.0,
+        total_bytes: Optional[int] = None,
+        total_files: int = 1,
+        buffer_size: int = 256,
+        output: TextIO = stdout,
+    ):
+        """
+        Init Reporter class, console lines are buffered and written in chunks
+        :param verbosity: Verbosity level: 0 - quiet, 1 - final summary, 2 - progress and periodic summaries,
+        3 - line for every created Hive host
+        :param interval: Interval between progress reports in seconds, example: 10.0
+        :param total_bytes: Size of nuclei output if known, used to estimate time of arrival, example: 1048576
+        :param total_files: Number of nuclei output files, example: 10
+        :param buffer_size: Max number of buffered console lines, example: 256
+        :param output: Console output stream, example: sys.stdout
+        """
+        self.verbosity = verbosity
+        self.interval = interval
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.buffer_size = buffer_size
+        self.output = output
+        self.lines: int = 0
+        self.bytes: int = 0
+        self.hosts: int = 0
+        self.severities: Dict[str, int] = dict()
+        self.templates: Dict[str, int] = dict()
+        self.files: Dict[str, List[int]] = dict()
+        self.finished_files: int = 0
+        self._buffer: List[str] = list()
+        self._lock: Lock = Lock()
+        self._start: float = monotonic()
+        self._last_report: float = self._start
+
+    def _write(self, line: str) -> None:
+        self._buffer.append(line if line.endswith("\n") else f"{line}\n")
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if len(self._buffer) > 0:
+            self.output.write("".join(self._buffer))
+            self.output.flush()
+            self._buffer = list()
+
+    def _report(self, force: bool = False) -> None:
+        now: float = monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        if self.verbosity >= PROGRESS:
+            for line in self.progress_lines(now):
+                self._write(line)
+        self._flush()
+
+    def progress_lines(self, now: Optional[float] = None) -> List[str]:
+        """
+        Make progress and summary lines
+        :param now: Current monotonic time, example: 12345.6
+        :return: List of console lines, example:
+        ['[INF] [hive-nuclei] Progress: 1200 lines, 0.5/1.0 MB (50%), 1000 hosts, 100.0 hosts/s, ETA: 0:00:12',
+         '[INF] [hive-nuclei] Severity: info: 900, high: 100',
+         '[INF] [hive-nuclei] Templates: tech-detect: 800, apache-version-detect: 200']
+        """
+        if now is None:
+            now = monotonic()
+        elapsed: float = max(now - self._start, 0.001)
+        progress: str = f"{self.lines} lines, "
+        if self.total_bytes:
+            progress += (
+                f"{self.bytes / 1048576:.1f}/{self.total_bytes / 1048576:.1f} MB "
+                f"({min(self.bytes * 100 // self.total_bytes, 100)}%), "
+            )
+        else:
+            progress += f"{self.bytes / 1048576:.1f} MB, "
+        progress += f"{self.hosts} hosts, {self.hosts / elapsed:.1f} hosts/s"
+        if self.total_bytes and 0 < self.bytes < self.total_bytes:
+            eta: int = int((self.total_bytes - self.bytes) * elapsed / self.bytes)
+            progress += f", ETA: {eta // 3600}:{eta // 60 % 60:02d}:{eta % 60:02d}"
+        lines: List[str] = [
+            format_info(f"{Style.BRIGHT}Progress:{Style.RESET_ALL} {progress}")
+        ]
+        if self.total_files > 1:
+            lines.append(
+                format_info(
+                    f"{Style.BRIGHT}Files:{Style.RESET_ALL} "
+                    f"{self.finished_files}/{self.total_files} finished"
+                )
+            )
+            for name, (file_lines, file_bytes, file_size) in self.files.items():
+                file_progress: str = f"{file_lines} lines"
+                if file_size > 0:
+                    file_progress += f", {min(file_bytes * 100 // file_size, 100)}%"
+                lines.append(
+                    format_info(
+                        f"{Style.BRIGHT}File:{Style.RESET_ALL} {name}: {file_progress}"
+                    )
+                )
+        if len(self.severities) > 0:
+            lines.append(
+                format_info(
+                    f"{Style.BRIGHT}Severity:{Style.RESET_ALL} "
+                    + ", ".join(
+                        f"{severity}: {count}"
+                        for severity, count in sorted(
+                            self.severities.items(), key=lambda item: -item[1]
+                        )
+                    )
+                )
+            )
+        if len(self.templates) > 0:
+            lines.append(
+                format_info(
+                    f"{Style.BRIGHT}Templates:{Style.RESET_ALL} "
+                    + ", ".join(
+                        f"{template}: {count}"
+                        for template, count in sorted(
+                            self.templates.items(), key=lambda item: -item[1]
+                        )[:10]
+                    )
+                )
+            )
+        return lines
+
+    def read_lines(
+        self,
+        lines: Iterable[str],
+        echo: bool = False,
+        name: Optional[str] = None,
+        size: int = 0,
+    ) -> Iterator[str]:
+        """
+        Count nuclei output lines while they are read
+        :param lines: Iterable of nuclei output lines, example: sys.stdin
+        :param echo: Print nuclei output lines
+        :param name: Nuclei output file name for per file progress, example: '/tmp/nuclei.json'
+        :param size: Nuclei output file size, example: 1048576
+        :return: Iterator of nuclei output lines
+        """
+        file_progress: List[int] = [0, 0, size]
+        for line in lines:
+            with self._lock:
+                if name is not None and file_progress[0] == 0:
+                    self.files[name] = file_progress
+                self.lines += 1
+                self.bytes += len(line)
+                file_progress[0] += 1
+                file_progress[1] += len(line)
+                if echo and self.verbosity > QUIET:
+                    self._write(line)
+                self._report()
+            yield line
+        if name is not None:
+            with self._lock:
+                self.files.pop(name, None)
+                self.finished_files += 1
+                if self.verbosity >= PROGRESS:
+                    self._write(
+                        format_info(
+                            f"{Style.BRIGHT}Finished file:{Style.RESET_ALL} {name}: "
+                            f"{file_progress[0]} lines"
+                        )
+                    )
+
+    def add_host(self, data: NucleiData, host: HiveLibrary.Host) -> None:
+        """
+        Count created Hive host
+        :param data: NucleiData object, example: NucleiData(template_id='apache-version-detect', severity='info', ...)
+        :param host: Created Hive host, example: HiveLibrary.Host(ip=IPv4Address('150.145.88.94'), ...)
+        :return: None
+        """
+        with self._lock:
+            self.hosts += 1
+            self.severities[data.severity] = self.severities.get(data.severity, 0) + 1
+            template_id: str = str(data.template_id)
+            self.templates[template_id] = self.templates.get(template_id, 0) + 1
+            if self.verbosity >= HOSTS:
+                self._write(format_hive_host(host))
+            self._report()
+
+    def info(self, message: str) -> None:
+        """
+        Print info message
+        :param message: Message string, example: 'Import is fully applied'
+        :return: None
+        """
+        with self._lock:
+            if self.verbosity > QUIET:
+                self._write(format_info(message))
+
+    def error(self, message: str) -> None:
+        """
+        Print error message
+        :param message: Message string, example: 'Failed to read file: /tmp/nuclei.json with nuclei output'
+        :return: None
+        """
+        with self._lock:
+            if self.verbosity > QUIET:
+                self._write(format_error(message))
+
+    def summary(self) -> None:
+        """
+        Print final summary with peak RSS and flush buffered lines
+        :return: None
+        """
+        with self._lock:
+            if self.verbosity >= SUMMARY:
+                for line in self.progress_lines():
+                    self._write(line)
+                peak_rss: Optional[int] = get_peak_rss()
+                if peak_rss is not None:
+                    self._write(
+                        format_info(
+                            f"{Style.BRIGHT}Peak RSS:{Style.RESET_ALL} {peak_rss / 1048576:.1f} MB"
+                        )
+                    )
+            self._flush()
+
+    def flush(self) -> None:
+        """
+        Write buffered console lines
+        :return: None
+        """
+        with self._lock:
+            self._flush()
@@ -0,0 +1,110 @@
+# Description
+"""
+Hive Nuclei connector name resolution cache
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from collections import OrderedDict
+from typing import Optional, Union, Tuple, Callable, Hashable
+from threading import Lock
+from time import monotonic
+from socket import gethostbyname, gethostbyaddr
+from ipaddress import IPv4Address, IPv6Address, ip_address
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+class ResolverCache:
+    def __init__(self, cache_size: int = 4096, negative_ttl: float = 300.0):
+        """
+        Init ResolverCache class, bounded LRU cache of lookup results,
+        failed lookups are cached for negative_ttl seconds only
+        :param cache_size: Max number of cached lookup results, example: 4096
+        :param negative_ttl: Seconds after which failed lookup is repeated, example: 300.0
+        """
+        self.cache_size = cache_size
+        self.negative_ttl = negative_ttl
+        self._cache: "OrderedDict[Hashable, Tuple[object, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: Hashable, lookup: Callable[[Hashable], object]) -> object:
+        """
+        Get cached lookup result or make lookup and cache its result
+        :param key: Lookup key, example: 'server.ispa.cnr.it'
+        :param lookup: Lookup function, returns None if lookup is failed, example: lambda name: gethostbyname(name)
+        :return: Lookup result, example: '150.145.88.94'
+        """
+        with self._lock:
+            if key in self._cache:
+                value, expires = self._cache[key]
+                if expires is None or expires > monotonic():
+                    self._cache.move_to_end(key)
+                    return value
+                del self._cache[key]
+        value = lookup(key)
+        with self._lock:
+            self._cache[key] = (
+                value,
+                monotonic() + self.negative_ttl if value is None else None,
+            )
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+
+class Resolver:
+    def __init__(self, cache_size: int = 4096, negative_ttl: float = 300.0):
+        """
+        Init Resolver class, resolves host names and IP addresses with bounded caches
+        :param cache_size: Max number of cached addresses and names, example: 4096
+        :param negative_ttl: Seconds after which failed lookup is repeated, example: 300.0
+        """
+        self.addresses: ResolverCache = ResolverCache(cache_size, negative_ttl)
+        self.names: ResolverCache = ResolverCache(cache_size, negative_ttl)
+
+    @staticmethod
+    def _lookup_address(hostname: str) -> Union[None, IPv4Address, IPv6Address]:
+        try:
+            return ip_address(gethostbyname(hostname))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _lookup_name(address: Union[IPv4Address, IPv6Address]) -> Optional[str]:
+        try:
+            return gethostbyaddr(str(address))[0]
+        except (OSError, ValueError):
+            return None
+
+    def address(self, hostname: str) -> Union[None, IPv4Address, IPv6Address]:
+        """
+        Get host IP address by name
+        :param hostname: Host name, example: 'server.ispa.cnr.it'
+        :return: None if name is not resolved or IP address, example: IPv4Address('150.145.88.94')
+        """
+        return self.addresses.get(hostname, self._lookup_address)
+
+    def name(self, address: Union[IPv4Address, IPv6Address]) -> Optional[str]:
+        """
+        Get host name by IP address
+        :param address: IP address, example: IPv4Address('150.145.88.94')
+        :return: None if address is not resolved or host name, example: 'server.ispa.cnr.it'
+        """
+        return self.names.get(address, self._lookup_name)
@@ -0,0 +1,191 @@
+# Description
+"""
+Hive Nuclei connector scope filter
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from typing import List, Dict, Optional, Union, Iterable
+from ipaddress import (
+    IPv4Address,
+    IPv6Address,
+    IPv4Network,
+    IPv6Network,
+    ip_address,
+    ip_network,
+)
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+class NetworkTree:
+    def __init__(self):
+        """
+        Init NetworkTree class, binary prefix tree of IPv4 and IPv6 networks,
+        lookup walks at most 32 or 128 nodes and does not depend on number of networks
+        """
+        self._roots: Dict[int, List] = {4: [None, None, False], 6: [None, None, False]}
+        self._length: int = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add(self, network: Union[IPv4Network, IPv6Network]) -> None:
+        """
+        Add network to tree
+        :param network: IP network, example: IPv4Network('10.0.0.0/8')
+        :return: None
+        """
+        node: List = self._roots[network.version]
+        address: int = int(network.network_address)
+        for index in range(network.prefixlen):
+            bit: int = (address >> (network.max_prefixlen - 1 - index)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, False]
+            node = node[bit]
+        node[2] = True
+        self._length += 1
+
+    def match(self, address: Union[IPv4Address, IPv6Address]) -> bool:
+        """
+        Check address is in one of tree networks
+        :param address: IP address, example: IPv4Address('10.1.2.3')
+        :return: True if address is in one of tree networks
+        """
+        node: Optional[List] = self._roots[address.version]
+        value: int = int(address)
+        max_prefixlen: int = address.max_prefixlen
+        for index in range(max_prefixlen):
+            if node[2]:
+                return True
+            node = node[(value >> (max_prefixlen - 1 - index)) & 1]
+            if node is None:
+                return False
+        return node[2]
+
+
+class HostnameTrie:
+    def __init__(self):
+        """
+        Init HostnameTrie class, trie of reversed host name labels,
+        lookup walks at most one node per label of host name
+        """
+        self._root: Dict[str, Dict] = dict()
+        self._length: int = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add(self, suffix: str) -> None:
+        """
+        Add host name suffix to trie
+        :param suffix: Host name suffix, example: '.corp.com'
+        :return: None
+        """
+        node: Dict[str, Dict] = self._root
+        for label in reversed(suffix.strip("*.").lower().split(".")):
+            node = node.setdefault(label, dict())
+        node[""] = dict()
+        self._length += 1
+
+    def match(self, hostname: str) -> bool:
+        """
+        Check host name equals or ends with one of trie suffixes
+        :param hostname: Host name, example: 'server.corp.com'
+        :return: True if host name equals or ends with one of trie suffixes
+        """
+        node: Optional[Dict[str, Dict]] = self._root
+        for label in reversed(hostname.rstrip(".").lower().split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if "" in node:
+                return True
+        return False
+
+
+class ScopeList:
+    def __init__(self, rules: Optional[Iterable[str]] = None):
+        """
+        Init ScopeList class
+        :param rules: Networks, IP addresses and host name suffixes, example: ['10.0.0.0/8', '.corp.com']
+        """
+        self.networks: NetworkTree = NetworkTree()
+        self.hostnames: HostnameTrie = HostnameTrie()
+        for rule in rules if rules is not None else list():
+            self.add(rule)
+
+    def __len__(self) -> int:
+        return len(self.networks) + len(self.hostnames)
+
+    def add(self, rule: str) -> None:
+        """
+        Add rule to scope list
+        :param rule: Network, IP address or host name suffix, example: '10.0.0.0/8'
+        :return: None
+        """
+        rule = rule.strip()
+        if len(rule) == 0 or rule.startswith("#"):
+            return
+        try:
+            self.networks.add(ip_network(rule, strict=False))
+        except ValueError:
+            self.hostnames.add(rule)
+
+    def match(self, name: Union[str, IPv4Address, IPv6Address]) -> bool:
+        """
+        Check IP address or host name matches scope list
+        :param name: IP address or host name, example: 'server.corp.com'
+        :return: True if name is in one of networks or ends with one of host name suffixes
+        """
+        if isinstance(name, (IPv4Address, IPv6Address)):
+            return self.networks.match(name)
+        try:
+            return self.networks.match(ip_address(name.strip("[]")))
+        except ValueError:
+            return self.hostnames.match(name)
+
+
+class Scope:
+    def __init__(
+        self,
+        allow: Optional[Iterable[str]] = None,
+        deny: Optional[Iterable[str]] = None,
+    ):
+        """
+        Init Scope class
+        :param allow: In scope networks, IP addresses and host name suffixes, all hosts are in scope if it is empty,
+        example: ['10.0.0.0/8', '.corp.com']
+        :param deny: Out of scope networks, IP addresses and host name suffixes, deny rules override allow rules,
+        example: ['10.0.0.1', '.cdn.corp.com']
+        """
+        self.allow: ScopeList = ScopeList(allow)
+        self.deny: ScopeList = ScopeList(deny)
+
+    def contains(
+        self, names: Iterable[Union[None, str, IPv4Address, IPv6Address]]
+    ) -> bool:
+        """
+        Check host is in scope
+        :param names: Host IP addresses and names, example: [IPv4Address('10.1.2.3'), 'server.corp.com']
+        :return: False if one of names matches deny list or allow list is set and no name matches it
+        """
+        allowed: bool = len(self.allow) == 0
+        for name in names:
+            if name is None or name == "":
+                continue
+            if self.deny.match(name):
+                return False
+            if not allowed and self.allow.match(name):
+                allowed = True
+        return allowed
@@ -0,0 +1,338 @@
+# Description
+"""
+Hive Nuclei connector ingestion service
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Lock, Thread, Event
+from queue import Queue, Full, Empty
+from urllib.parse import urlparse
+from typing import List, Dict, Optional, Iterator, Tuple
+from json import dumps
+from os import remove, lstat
+from os.path import lexists
+from stat import S_ISSOCK
+from errno import EEXIST
+from socket import AF_INET6
+from ipaddress import ip_address
+from hive_nuclei import HiveNuclei, NucleiData
+from hive_nuclei.reporter import Reporter
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+def parse_address(address: str, allow_remote: bool = False) -> Tuple[str, int]:
+    """
+    Parse service TCP address, only loopback addresses are allowed by default
+    :param address: TCP address, example: '127.0.0.1:8090' or '[::1]:8090'
+    :param allow_remote: Allow not loopback and all interfaces addresses
+    :return: Host and port, example: ('127.0.0.1', 8090)
+    """
+    host, separator, port = address.rpartition(":")
+    if separator == "" or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Bad TCP address: {address}, example: 127.0.0.1:8090")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    if not allow_remote:
+        try:
+            loopback: bool = ip_address(host).is_loopback
+        except ValueError:
+            loopback = host == "localhost"
+        if not loopback:
+            raise ValueError(
+                f"Not loopback TCP address: {address}, service does not authenticate requests, "
+                "allow remote addresses explicitly to listen it"
+            )
+    return host, int(port)
+
+
+def is_socket(path: str) -> bool:
+    """
+    Check path is Unix socket
+    :param path: Path, example: '/tmp/hive-nuclei.sock'
+    :return: True if path exists and it is Unix socket
+    """
+    return lexists(path) and S_ISSOCK(lstat(path).st_mode)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ThreadingHTTPServer6(ThreadingHTTPServer):
+    address_family = AF_INET6
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        # Remove stale socket of stopped service, other files are never removed
+        if is_socket(self.server_address):
+            remove(self.server_address)
+        elif lexists(self.server_address):
+            raise FileExistsError(
+                EEXIST, "File exists and it is not Unix socket", self.server_address
+            )
+        UnixStreamServer.server_bind(self)
+        self.server_name = str(self.server_address)
+        self.server_port = 0
+
+
+class NucleiService:
+    def __init__(self, hive_nuclei: HiveNuclei, reporter: Optional[Reporter] = None):
+        """
+        Init NucleiService class, nuclei outputs from all requests are sent to Hive through one upload queue
+        of one HiveNuclei instance, so Hive session, resolver and template caches are shared between scans
+        :param hive_nuclei: HiveNuclei object, example: HiveNuclei(project_id=UUID('2b10f974-3215-4a4e-9fb7-04be8ac5202e'))
+        :param reporter: Console reporter, example: Reporter(verbosity=2)
+        """
+        self.hive_nuclei = hive_nuclei
+        self.reporter = reporter
+        self.requests: int = 0
+        self.findings: int = 0
+        self.hosts: int = 0
+        self.error: Optional[BaseException] = None
+        self._lock: Lock = Lock()
+        self._findings: Queue = Queue(maxsize=hive_nuclei.max_in_flight)
+        self._stopped: Event = Event()
+        self._upload_stopped: Event = Event()
+        self._servers: List[HTTPServer] = list()
+        self._threads: List[Thread] = list()
+
+    def _iter_findings(self) -> Iterator[NucleiData]:
+        while True:
+            try:
+                data: Optional[NucleiData] = self._findings.get(timeout=0.1)
+            except Empty:
+                if self._upload_stopped.is_set():
+                    return
+                continue
+            if data is None:
+                return
+            yield data
+
+    def _upload(self) -> None:
+        try:
+            for data, host, _ in self.hive_nuclei._upload_nuclei_stream(
+                [self._iter_findings()], workers=1, stopped=self._upload_stopped
+            ):
+                with self._lock:
+                    self.hosts += 1
+                if self.reporter is not None:
+                    self.reporter.add_host(data, host)
+        except BaseException as error:
+            self.error = error
+            if self.reporter is not None:
+                self.reporter.info(f"Failed to upload nuclei data: {error}")
+                self.reporter.flush()
+            self._stopped.set()
+            for server in self._servers:
+                Thread(target=server.shutdown, daemon=True).start()
+
+    def put(self, lines: Iterator[str], json_output: bool = True) -> int:
+        """
+        Parse nuclei output lines and put parsed data to upload queue, waits when upload queue is full
+        :param lines: Iterator of nuclei output lines, example: iter(['{"templateID":"tech-detect", ...}'])
+        :param json_output: Nuclei output is json
+        :return: Number of parsed nuclei data objects, example: 3
+        """
+        with self._lock:
+            self.requests += 1
+        if self.reporter is not None:
+            lines = self.reporter.read_lines(lines)
+        if json_output:
+            data_iterator = self.hive_nuclei._iter_nuclei_json_output(lines)
+        else:
+            data_iterator = self.hive_nuclei._iter_nuclei_console_output(lines)
+        findings: int = 0
+        for data in data_iterator:
+            while True:
+                if self._stopped.is_set():
+                    raise RuntimeError("Nuclei service is stopped")
+                try:
+                    self._findings.put(data, timeout=0.1)
+                    break
+                except Full:
+                    continue
+            findings += 1
+        with self._lock:
+            self.findings += findings
+        if self.reporter is not None:
+            self.reporter.flush()
+        return findings
+
+    def status(self) -> Dict:
+        """
+        Get service counters
+        :return: Dictionary with service counters, example:
+        {'requests': 2, 'findings': 6, 'hosts': 6, 'out_of_scope': 0, 'not_routed': 0, 'queued': 0}
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "findings": self.findings,
+                "hosts": self.hosts,
+                "out_of_scope": self.hive_nuclei.out_of_scope,
+                "not_routed": self.hive_nuclei.not_routed,
+                "queued": self._findings.qsize(),
+            }
+
+    def serve(
+        self,
+        address: Optional[str] = None,
+        unix_socket: Optional[str] = None,
+        allow_remote: bool = False,
+    ) -> None:
+        """
+        Start upload pipeline and HTTP servers, returns when stop is called or upload fails
+        :param address: TCP address to listen, example: '127.0.0.1:8090' or '[::1]:8090'
+        :param unix_socket: Unix socket path to listen, example: '/tmp/hive-nuclei.sock'
+        :param allow_remote: Allow not loopback and all interfaces TCP addresses
+        :return: None
+        """
+        service: NucleiService = self
+
+        class Handler(NucleiRequestHandler):
+            nuclei_service = service
+
+        if address is not None:
+            host, port = parse_address(address, allow_remote=allow_remote)
+            if ":" in host:
+                self._servers.append(ThreadingHTTPServer6((host, port), Handler))
+            else:
+                self._servers.append(ThreadingHTTPServer((host, port), Handler))
+        if unix_socket is not None:
+            self._servers.append(ThreadingUnixHTTPServer(unix_socket, Handler))
+        upload_thread: Thread = Thread(target=self._upload, daemon=True)
+        upload_thread.start()
+        self._threads.append(upload_thread)
+        for server in self._servers:
+            server_thread: Thread = Thread(target=server.serve_forever, daemon=True)
+            server_thread.start()
+            self._threads.append(server_thread)
+        try:
+            while not self._stopped.is_set():
+                self._stopped.wait(1.0)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        Stop HTTP servers and wait until all queued nuclei data is uploaded
+        :return: None
+        """
+        self._stopped.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server, ThreadingUnixHTTPServer) and is_socket(
+                server.server_address
+            ):
+                remove(server.server_address)
+        self._servers = list()
+        while not self._upload_stopped.is_set():
+            try:
+                self._findings.put(None, timeout=0.1)
+                break
+            except Full:
+                continue
+        for thread in self._threads:
+            thread.join()
+        self._threads = list()
+
+
+class NucleiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    nuclei_service: Optional[NucleiService] = None
+
+    def address_string(self) -> str:
+        # Unix socket client address is empty string
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, code: int, body: Dict) -> None:
+        content: bytes = dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_chunks(self) -> Iterator[bytes]:
+        # Transfer-Encoding: chunked, every chunk is size line, data and CRLF
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size_line: bytes = self.rfile.readline(65537)
+                size: int = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip trailer headers
+                    while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield self.rfile.read(size)
+                self.rfile.readline(65537)
+        else:
+            length: int = int(self.headers.get("Content-Length", "0"))
+            while length > 0:
+                chunk: bytes = self.rfile.read(min(length, 65536))
+                if len(chunk) == 0:
+                    return
+                length -= len(chunk)
+                yield chunk
+
+    def _read_lines(self) -> Iterator[str]:
+        # Split request body into lines while it is received
+        rest: bytes = b""
+        for chunk in self._read_chunks():
+            lines: List[bytes] = (rest + chunk).split(b"\n")
+            rest = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8", errors="replace") + "\n"
+        if len(rest) > 0:
+            yield rest.decode("utf-8", errors="replace")
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path == "/status":
+            self._send_json(200, self.nuclei_service.status())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        path: str = urlparse(self.path).path
+        if path not in ("/json", "/console"):
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            findings: int = self.nuclei_service.put(
+                self._read_lines(), json_output=path == "/json"
+            )
+        except ValueError as error:
+            self.close_connection = True
+            self._send_json(400, {"error": str(error)})
+            return
+        except RuntimeError as error:
+            self.close_connection = True
+            self._send_json(503, {"error": str(error)})
+            return
+        self._send_json(200, {"findings": findings})
+
+    # curl -T streams request body with PUT method
+    do_PUT = do_POST
@@ -0,0 +1,164 @@
+# Description
+"""
+Hive Nuclei connector target normalization
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from dataclasses import dataclass
+from typing import Dict, Optional, Callable
+from functools import lru_cache
+from re import compile
+from urllib.parse import urlparse, ParseResult
+from ipaddress import ip_address
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Default ports for url schemes without port
+DEFAULT_PORTS: Dict[str, int] = {
+    "ftp": 21,
+    "sftp": 22,
+    "ssh": 22,
+    "scp": 22,
+    "telnet": 23,
+    "smtp": 25,
+    "dns": 53,
+    "tftp": 69,
+    "gopher": 70,
+    "finger": 79,
+    "http": 80,
+    "ws": 80,
+    "pop3": 110,
+    "nntp": 119,
+    "ntp": 123,
+    "imap": 143,
+    "snmp": 161,
+    "ldap": 389,
+    "https": 443,
+    "wss": 443,
+    "smb": 445,
+    "smtps": 465,
+    "rtsp": 554,
+    "nntps": 563,
+    "submission": 587,
+    "ipp": 631,
+    "ldaps": 636,
+    "rsync": 873,
+    "ftps": 990,
+    "imaps": 993,
+    "pop3s": 995,
+    "socks": 1080,
+    "socks5": 1080,
+    "mssql": 1433,
+    "oracle": 1521,
+    "mqtt": 1883,
+    "nfs": 2049,
+    "docker": 2375,
+    "mysql": 3306,
+    "rdp": 3389,
+    "svn": 3690,
+    "sip": 5060,
+    "sips": 5061,
+    "xmpp": 5222,
+    "postgres": 5432,
+    "postgresql": 5432,
+    "amqps": 5671,
+    "amqp": 5672,
+    "vnc": 5900,
+    "couchdb": 5984,
+    "redis": 6379,
+    "irc": 6667,
+    "mqtts": 8883,
+    "kafka": 9092,
+    "elasticsearch": 9200,
+    "git": 9418,
+    "memcached": 11211,
+    "mongodb": 27017,
+}
+
+# Nuclei matched field regexes
+MATCHED_EXTRACTED_REGEX = compile(r"^(?P<matched>.*) \[(?P<extracted>.*)\]$")
+MATCHED_ADDRESS_PORT_REGEX = compile(
+    r"^(?P<address>[0-9a-zA-Z.-_:]{3,64}):"
+    r"(?P<port>[0-9]{1,4}|[1-5][0-9]{4}|6[0-4][0-9]{3}|65[0-4][0-9]{2}|655[0-2][0-9]|6553[0-5])$"
+)
+
+
+@dataclass(frozen=True)
+class Target:
+    matched: Optional[str] = None
+    extracted: Optional[str] = None
+    scheme: Optional[str] = None
+    address: Optional[str] = None
+    port: Optional[int] = None
+
+
+class TargetNormalizer:
+    def __init__(self, cache_size: int = 4096):
+        """
+        Init TargetNormalizer class, targets are memoized in bounded LRU cache keyed on raw matched string
+        :param cache_size: Max number of memoized targets, example: 4096
+        """
+        self.cache_size = cache_size
+        self.normalize: Callable[[Optional[str]], Target] = lru_cache(
+            maxsize=cache_size
+        )(self.split)
+
+    @staticmethod
+    def split(matched: Optional[str]) -> Target:
+        """
+        Split nuclei matched field into target parts without cache
+        :param matched: Nuclei matched field, example: 'http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]'
+        :return: Target object, scheme is None if matched is not url, example:
+        Target(matched='http://server.ispa.cnr.it/', extracted='Apache/2.4.7 (Ubuntu)', scheme='http',
+               address='server.ispa.cnr.it', port=80)
+        """
+        if matched is None:
+            return Target()
+        extracted: Optional[str] = None
+        extracted_search = MATCHED_EXTRACTED_REGEX.search(matched)
+        if extracted_search:
+            matched = str(extracted_search.group("matched"))
+            extracted = str(extracted_search.group("extracted"))
+
+        # Url: scheme://address:port/path
+        try:
+            urlparse_result: ParseResult = urlparse(matched)
+            hostname: Optional[str] = urlparse_result.hostname
+        except ValueError:
+            hostname = None
+        if hostname is not None:
+            try:
+                port: Optional[int] = urlparse_result.port
+                if port is None:
+                    port = DEFAULT_PORTS.get(urlparse_result.scheme)
+            except ValueError:
+                port = None
+            return Target(matched, extracted, urlparse_result.scheme, hostname, port)
+
+        # IP address without port: 192.168.0.1 or 2001:db8::1
+        try:
+            return Target(matched, extracted, address=str(ip_address(matched)))
+        except ValueError:
+            pass
+
+        # Address and port: 192.168.0.1:22 or [2001:db8::1]:22
+        matched_search = MATCHED_ADDRESS_PORT_REGEX.search(matched)
+        if matched_search:
+            address: str = str(matched_search.group("address"))
+            if address.startswith("[") and address.endswith("]"):
+                address = address[1:-1]
+            return Target(
+                matched, extracted, None, address, int(matched_search.group("port"))
+            )
+        return Target(matched, extracted)
@@ -0,0 +1,177 @@
+# Description
+"""
+Hive Nuclei connector timestamp decoding
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from typing import Optional, Tuple
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from re import compile
+from marshmallow import fields
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# ISO 8601 datetime regex, the same as marshmallow fields.DateTime accepts
+ISO_DATETIME_REGEX = compile(
+    r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})[T ]"
+    r"(?P<hour>\d{1,2}):(?P<minute>\d{1,2})"
+    r"(?::(?P<second>\d{1,2})(?:\.(?P<microsecond>\d{1,6})\d{0,6})?)?"
+    r"(?P<tzinfo>Z|[+-]\d{2}(?::?\d{2})?)?$"
+)
+
+# Timestamp with second resolution regex: 2021-06-07T12:57:27 or 2021-06-07 12:57:27
+SECOND_REGEX = compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}[T ][0-9]{2}:[0-9]{2}:[0-9]{2}")
+
+# Time zone offset regex: Z, +03, +0300 or +03:00
+OFFSET_REGEX = compile(r"(Z|[+-][0-9]{2}(?::?[0-9]{2})?)?")
+
+
+@lru_cache(maxsize=64)
+def get_timezone(offset: Optional[str]) -> Optional[timezone]:
+    """
+    Get fixed offset time zone, the same as marshmallow fields.DateTime makes
+    :param offset: Time zone offset, example: '+03:00'
+    :return: None if offset is not set or time zone, example: datetime.timezone(datetime.timedelta(seconds=10800), '+0300')
+    """
+    if offset is None or offset == "":
+        return None
+    if offset == "Z":
+        return timezone.utc
+    minutes: int = 60 * int(offset[1:3]) + (int(offset[-2:]) if len(offset) > 3 else 0)
+    if offset[0] == "-":
+        minutes = -minutes
+    return timezone(
+        timedelta(minutes=minutes),
+        "{}{:02d}{:02d}".format("-" if minutes < 0 else "+", *divmod(abs(minutes), 60)),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _decode_second(second: str, offset: Optional[str]) -> datetime:
+    """
+    Decode timestamp with second resolution, consecutive nuclei lines usually share the same second
+    :param second: Timestamp up to seconds, example: '2021-06-07T12:57:27'
+    :param offset: Time zone offset, example: '+03:00'
+    :return: Datetime object, example:
+    datetime.datetime(2021, 6, 7, 12, 57, 27, tzinfo=datetime.timezone(datetime.timedelta(seconds=10800), '+0300'))
+    """
+    if SECOND_REGEX.fullmatch(second) is None:
+        raise ValueError(f"Not a valid timestamp: {second}")
+    return datetime(
+        int(second[0:4]),
+        int(second[5:7]),
+        int(second[8:10]),
+        int(second[11:13]),
+        int(second[14:16]),
+        int(second[17:19]),
+        tzinfo=get_timezone(offset),
+    )
+
+
+def _split_iso_timestamp(value: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split ISO timestamp with fixed width date and time into second, fraction and offset
+    :param value: ISO timestamp, example: '2021-06-07T12:57:27.577122+03:00'
+    :return: None if timestamp is not fixed width or tuple of second, fraction digits and offset, example:
+    ('2021-06-07T12:57:27', '577122', '+03:00')
+    """
+    if (
+        len(value) < 19
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[10] not in "T "
+        or value[13] != ":"
+        or value[16] != ":"
+    ):
+        return None
+    fraction: str = ""
+    index: int = 19
+    if len(value) > index and value[index] == ".":
+        index += 1
+        while index < len(value) and "0" <= value[index] <= "9":
+            index += 1
+        fraction = value[20:index]
+        if not 0 < len(fraction) <= 12:
+            return None
+    offset: str = value[index:]
+    if OFFSET_REGEX.fullmatch(offset) is None:
+        return None
+    return value[:19], fraction, offset
+
+
+def decode_iso_timestamp(value: str) -> datetime:
+    """
+    Decode nuclei json output timestamp, result is equal to marshmallow fields.DateTime result
+    :param value: ISO timestamp, example: '2021-06-07T12:57:27.577122+03:00'
+    :return: Datetime object, example:
+    datetime.datetime(2021, 6, 7, 12, 57, 27, 577122,
+                      tzinfo=datetime.timezone(datetime.timedelta(seconds=10800), '+0300'))
+    """
+    parts: Optional[Tuple[str, str, str]] = _split_iso_timestamp(value)
+    if parts is not None:
+        second, fraction, offset = parts
+        try:
+            date: datetime = _decode_second(second, offset)
+            if fraction != "":
+                date = date.replace(microsecond=int(fraction[:6].ljust(6, "0")))
+            return date
+        except ValueError:
+            pass
+
+    # Timestamp without seconds or with not padded date and time
+    match = ISO_DATETIME_REGEX.match(value)
+    if not match:
+        raise ValueError(f"Not a valid ISO8601-formatted timestamp: {value}")
+    microsecond: Optional[str] = match.group("microsecond")
+    return datetime(
+        int(match.group("year")),
+        int(match.group("month")),
+        int(match.group("day")),
+        int(match.group("hour")),
+        int(match.group("minute")),
+        int(match.group("second") or 0),
+        int(microsecond.ljust(6, "0")) if microsecond else 0,
+        tzinfo=get_timezone(match.group("tzinfo")),
+    )
+
+
+def decode_console_timestamp(value: str) -> datetime:
+    """
+    Decode nuclei console output timestamp, result is equal to datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    :param value: Console timestamp, example: '2021-06-07 12:54:47'
+    :return: Datetime object, example: datetime.datetime(2021, 6, 7, 12, 54, 47)
+    """
+    if len(value) == 19 and value[10] == " ":
+        try:
+            return _decode_second(value, None)
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+class Timestamp(fields.DateTime):
+    """
+    Marshmallow DateTime field which decodes nuclei json output timestamp with per second cache
+    """
+
+    def _deserialize(self, value, attr, data, **kwargs) -> datetime:
+        if not value or not isinstance(value, str):
+            raise self.make_error("invalid", input=value, obj_type=self.OBJ_TYPE)
+        try:
+            return decode_iso_timestamp(value)
+        except ValueError as error:
+            raise self.make_error(
+                "invalid", input=value, obj_type=self.OBJ_TYPE
+            ) from error
@@ -52,6 +52,7 @@ setup(
         "Topic :: Security",
     ],
     install_requires=["hive-library", "marshmallow", "colorama"],
+    extras_require={"arrow": ["pyarrow"]},
     entry_points={
         "console_scripts": ["hive-nuclei=hive_nuclei.cli:main"],
     },
@@ -11,9 +11,8 @@ from unittest import TestCase
 from test_variables import HiveVariables
 from hive_library import HiveLibrary
 from hive_library.rest import HiveRestApi
-from hive_nuclei import HiveNuclei
+from hive_nuclei import HiveNuclei, ImportStatus
 from typing import Optional, List
-from time import sleep
 
 # Authorship information
 __author__ = "Vladimir Ivanov"
@@ -69,7 +68,8 @@ class HiveNucleiTest(TestCase):
         self.assertGreater(len(created_hosts), 0)
         self.assertIsInstance(created_hosts[0], HiveLibrary.Host)
         created_host: HiveLibrary.Host = created_hosts[0]
-        sleep(10)
+        import_status: ImportStatus = hive_nuclei.wait_for_tasks()
+        self.assertTrue(import_status.applied)
         existing_hosts: Optional[List[HiveLibrary.Host]] = hive_api.get_hosts(
             project_id=variables.project.id
         )
@@ -117,7 +117,8 @@ class HiveNucleiTest(TestCase):
         self.assertGreater(len(created_hosts), 0)
         self.assertIsInstance(created_hosts[0], HiveLibrary.Host)
         created_host: HiveLibrary.Host = created_hosts[0]
-        sleep(10)
+        import_status: ImportStatus = hive_nuclei.wait_for_tasks()
+        self.assertTrue(import_status.applied)
         existing_hosts: Optional[List[HiveLibrary.Host]] = hive_api.get_hosts(
             project_id=variables.project.id
         )
@@ -164,7 +165,8 @@ class HiveNucleiTest(TestCase):
         self.assertGreater(len(created_hosts), 0)
         self.assertIsInstance(created_hosts[0], HiveLibrary.Host)
         created_host: HiveLibrary.Host = created_hosts[0]
-        sleep(10)
+        import_status: ImportStatus = hive_nuclei.wait_for_tasks()
+        self.assertTrue(import_status.applied)
         existing_hosts: Optional[List[HiveLibrary.Host]] = hive_api.get_hosts(
             project_id=variables.project.id
         )
@@ -0,0 +1,185 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector aggregation of template hits
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from dataclasses import replace
+from datetime import datetime
+from uuid import UUID, uuid4
+from typing import Optional, List
+from hive_nuclei import HiveNuclei, NucleiData
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+def make_hive_nuclei(**kwargs) -> HiveNuclei:
+    with patch("hive_nuclei.HiveRestApi"):
+        return HiveNuclei(
+            server="http://127.0.0.1",
+            project_id=UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e"),
+            aggregate=True,
+            **kwargs,
+        )
+
+
+def make_data(
+    second: int,
+    template_id: str = "tech-detect",
+    port: int = 80,
+    path: str = "",
+    extracted_results: Optional[List[str]] = None,
+) -> NucleiData:
+    return NucleiData(
+        date=datetime(2021, 6, 7, 12, 54, second),
+        template_id=template_id,
+        type="http",
+        address="150.145.88.94",
+        port=port,
+        matched=f"http://server.ispa.cnr.it:{port}/{path}",
+        extracted_results=extracted_results,
+    )
+
+
+# Class AggregateTest
+class AggregateTest(TestCase):
+
+    # Fold hits of the same template on the same host and port
+    def test01_aggregate_hits(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        aggregates: List[NucleiData] = list(
+            hive_nuclei._aggregate_nuclei_data(
+                [
+                    make_data(30),
+                    make_data(10, path="index.php"),
+                    make_data(50),
+                    make_data(20, port=443),
+                    make_data(40, template_id="apache-version-detect"),
+                ]
+            )
+        )
+        self.assertEqual(len(aggregates), 3)
+        aggregate: NucleiData = aggregates[0]
+        self.assertEqual(aggregate.hits, 3)
+        self.assertEqual(aggregate.date, datetime(2021, 6, 7, 12, 54, 10))
+        self.assertEqual(aggregate.last_date, datetime(2021, 6, 7, 12, 54, 50))
+        self.assertEqual(
+            aggregate.matched_list,
+            [
+                "http://server.ispa.cnr.it:80/",
+                "http://server.ispa.cnr.it:80/index.php",
+            ],
+        )
+        self.assertEqual([data.hits for data in aggregates[1:]], [1, 1])
+        self.assertEqual(aggregates[1].port, 443)
+        self.assertEqual(aggregates[1].date, aggregates[1].last_date)
+
+    # Limit matched urls and extracted results
+    def test02_aggregate_limit(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(aggregate_limit=2)
+        aggregates: List[NucleiData] = list(
+            hive_nuclei._aggregate_nuclei_data(
+                [
+                    make_data(1, path="a", extracted_results=["e1", "e2", "e3"]),
+                    make_data(2, path="b", extracted_results=["e1"]),
+                    make_data(3, path="c", extracted_results=["e4"]),
+                    make_data(4, path="a"),
+                ]
+            )
+        )
+        self.assertEqual(len(aggregates), 1)
+        self.assertEqual(aggregates[0].hits, 4)
+        self.assertEqual(len(aggregates[0].matched_list), 2)
+        self.assertEqual(aggregates[0].extracted_results, ["e1", "e2"])
+
+        # Extracted results are collected from later hits
+        aggregates = list(
+            hive_nuclei._aggregate_nuclei_data(
+                [make_data(1), make_data(2, extracted_results=["e1", "e1", "e2"])]
+            )
+        )
+        self.assertEqual(aggregates[0].extracted_results, ["e1", "e2"])
+
+    # Produce aggregates of streamed input every aggregate_interval
+    def test03_aggregate_window(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(aggregate_interval=3600.0)
+        aggregates: List[NucleiData] = list(
+            hive_nuclei._aggregate_nuclei_data([make_data(1), None, make_data(2), None])
+        )
+        self.assertEqual([data.hits for data in aggregates], [2])
+
+        # Expired window is produced while input is idle
+        hive_nuclei = make_hive_nuclei(aggregate_interval=0.0)
+        data_iterator = hive_nuclei._aggregate_nuclei_data(
+            iter([make_data(1), make_data(2), None])
+        )
+        self.assertEqual(next(data_iterator).hits, 1)
+        # Totals are kept between windows
+        self.assertEqual(next(data_iterator).hits, 2)
+        self.assertEqual(list(data_iterator), list())
+
+        # Full window is produced before interval is expired
+        hive_nuclei = make_hive_nuclei(aggregate_interval=3600.0, max_in_flight=2)
+        aggregates = list(
+            hive_nuclei._aggregate_nuclei_data(
+                [make_data(1, port=port) for port in [1, 2, 3, 1]]
+            )
+        )
+        self.assertEqual([data.port for data in aggregates], [1, 2, 3, 1])
+        self.assertEqual([data.hits for data in aggregates], [1, 1, 1, 2])
+
+        # Produced aggregate is not changed by later windows
+        hive_nuclei = make_hive_nuclei(aggregate_interval=0.0)
+        data_iterator = hive_nuclei._aggregate_nuclei_data(
+            iter([make_data(1, path="a"), make_data(2, path="b"), None])
+        )
+        first: NucleiData = next(data_iterator)
+        self.assertEqual(
+            list(data_iterator)[0].matched_list,
+            ["http://server.ispa.cnr.it:80/a", "http://server.ispa.cnr.it:80/b"],
+        )
+        self.assertEqual(first.hits, 1)
+        self.assertEqual(first.matched_list, ["http://server.ispa.cnr.it:80/a"])
+
+        # Least recently hit totals are forgotten
+        hive_nuclei = make_hive_nuclei(aggregate_interval=0.0, aggregate_cache_size=1)
+        aggregates = list(
+            hive_nuclei._aggregate_nuclei_data(
+                [make_data(1, port=port) for port in [1, 2, 1]]
+            )
+        )
+        self.assertEqual([data.hits for data in aggregates], [1, 1, 1])
+
+    # Aggregated record is uploaded again with total hits if skip_existing is set
+    def test04_aggregate_window_skip_existing(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(
+            aggregate_interval=0.0, skip_existing=True
+        )
+        hive_nuclei.hive_api.get_hosts.return_value = [
+            hive_nuclei._make_hive_host(replace(make_data(1, port=443), hits=1))
+        ]
+        hive_nuclei.hive_api.create_host.side_effect = lambda **kwargs: uuid4()
+        results = list(
+            hive_nuclei._upload_nuclei_stream(
+                [[make_data(1), make_data(2, port=443), make_data(3), make_data(4)]]
+            )
+        )
+        self.assertEqual(
+            [(data.port, data.hits) for data, _, _ in results],
+            [(80, 1), (80, 2), (80, 3)],
+        )
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 3)
+        self.assertEqual(hive_nuclei.hive_api.get_hosts.call_count, 1)
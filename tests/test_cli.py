@@ -0,0 +1,127 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector console client
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from io import StringIO
+from os import mkdir
+from signal import SIGTERM
+from subprocess import Popen
+from sys import executable
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import Dict
+from hive_nuclei.cli import (
+    get_exit_code,
+    get_nuclei_output_files,
+    get_nuclei_output_format,
+    read_nuclei_output_file,
+)
+from hive_nuclei.reporter import Reporter, QUIET, HOSTS
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Global variables
+nuclei_output_files: Dict[str, str] = {
+    "nuclei.json": '\n{"templateID":"tech-detect","matched":"http://server.ispa.cnr.it/"}\n',
+    "nuclei.txt": "[2021-06-07 12:54:47] [tech-detect] [http] [info] http://server.ispa.cnr.it/\n",
+    "nuclei_color.txt": "\x1b[36m2021-06-07 12:54:47\x1b[0m] [tech-detect] [http] [info] http://10.0.0.1/\n",
+    "scan.sh": "#!/bin/sh\nnuclei -l targets.txt -json\n",
+    "empty.txt": "",
+    "binary.bin": "\udcff",
+}
+
+
+def make_files(directory: str) -> None:
+    mkdir(join(directory, "scans"))
+    for name, content in nuclei_output_files.items():
+        with open(
+            join(directory, "scans", name), "w", errors="surrogateescape"
+        ) as file:
+            file.write(content)
+
+
+# Class CliTest
+class CliTest(TestCase):
+
+    # Detect nuclei output format by first not empty line
+    def test01_nuclei_output_format(self):
+        with TemporaryDirectory() as directory:
+            make_files(directory)
+            formats = {
+                name: get_nuclei_output_format(join(directory, "scans", name))
+                for name in nuclei_output_files
+            }
+        self.assertEqual(
+            formats,
+            {
+                "nuclei.json": True,
+                "nuclei.txt": False,
+                "nuclei_color.txt": False,
+                "scan.sh": None,
+                "empty.txt": None,
+                "binary.bin": None,
+            },
+        )
+
+    # Skip files in directories which are not nuclei output
+    def test02_nuclei_output_files(self):
+        output: StringIO = StringIO()
+        reporter: Reporter = Reporter(verbosity=HOSTS, output=output)
+        with TemporaryDirectory() as directory:
+            make_files(directory)
+            file_names = get_nuclei_output_files(
+                [
+                    directory,
+                    join(directory, "scans", "scan.sh"),
+                    join(directory, "missing", "*.json"),
+                ],
+                reporter,
+            )
+        self.assertEqual(
+            file_names,
+            [
+                join(directory, "scans", name)
+                for name in ["nuclei.json", "nuclei.txt", "nuclei_color.txt"]
+            ]
+            + [join(directory, "scans", "scan.sh")],
+        )
+        reporter.flush()
+        self.assertIn("ERR", output.getvalue())
+        self.assertIn("Not found file", output.getvalue())
+
+    # Errors of reading file are reported by reporter
+    def test03_read_nuclei_output_file(self):
+        with TemporaryDirectory() as directory:
+            file_name: str = join(directory, "nuclei.txt")
+            for verbosity, has_error in [(HOSTS, True), (QUIET, False)]:
+                output: StringIO = StringIO()
+                reporter: Reporter = Reporter(verbosity=verbosity, output=output)
+                self.assertEqual(
+                    list(read_nuclei_output_file(file_name, reporter)), list()
+                )
+                reporter.flush()
+                self.assertEqual("Failed to read file" in output.getvalue(), has_error)
+
+    # Nuclei killed by signal exits with 128 + signal number
+    def test04_exit_code(self):
+        self.assertEqual(get_exit_code(0), 0)
+        self.assertEqual(get_exit_code(2), 2)
+        self.assertEqual(get_exit_code(-SIGTERM), 143)
+        self.assertEqual(get_exit_code(-9), 137)
+        process: Popen = Popen([executable, "-c", "import time; time.sleep(60)"])
+        process.terminate()
+        self.assertEqual(get_exit_code(process.wait()), 128 + SIGTERM)
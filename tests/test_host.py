@@ -0,0 +1,367 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector Hive hosts
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime
+from ipaddress import IPv4Address, IPv6Address, ip_address, ip_network
+from typing import Union, Dict, List
+from uuid import UUID, uuid4
+from hive_library import HiveLibrary
+from hive_nuclei import HiveNuclei, NucleiData, ProjectRoute
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Global variables
+project_id: UUID = UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e")
+
+
+def make_hive_nuclei(**kwargs) -> HiveNuclei:
+    with patch("hive_nuclei.HiveRestApi"):
+        hive_nuclei: HiveNuclei = HiveNuclei(
+            server="http://127.0.0.1",
+            project_id=kwargs.pop("project_id", project_id),
+            **kwargs,
+        )
+    hive_nuclei.hive_api.create_host.side_effect = lambda **kwargs: uuid4()
+    return hive_nuclei
+
+
+def get_record_children(host: HiveLibrary.Host) -> Dict[str, object]:
+    # Child records of uploaded nuclei record by name
+    return {child.name: child.value for child in host.ports[0].records[0].value}
+
+
+def make_data(
+    address: str = "150.145.88.94",
+    port: int = 80,
+    template_id: str = "apache-version-detect",
+    ip: Union[None, IPv4Address, IPv6Address] = None,
+) -> NucleiData:
+    host: str = f"[{address}]" if ":" in address else address
+    return NucleiData(
+        date=datetime(2021, 6, 7, 12, 54, 47),
+        template_id=template_id,
+        severity="info",
+        tags="tech,apache",
+        reference="https://httpd.apache.org/",
+        description="Apache version detection",
+        type="http",
+        ip=ip,
+        address=address,
+        scheme="http",
+        port=port,
+        matched=f"http://{host}:{port}/",
+    )
+
+
+# Class HostTest
+class HostTest(TestCase):
+
+    # Only IPv4 address is set as Hive host ip, IPv6 address is set as host name
+    def test01_make_hive_host_ip(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        host: HiveLibrary.Host = hive_nuclei._make_hive_host(make_data())
+        self.assertEqual(host.ip, IPv4Address("150.145.88.94"))
+        self.assertEqual(host.names, list())
+
+        host = hive_nuclei._make_hive_host(make_data(address="2001:db8::1"))
+        self.assertIsNone(host.ip)
+        self.assertEqual([name.hostname for name in host.names], ["2001:db8::1"])
+        # IPv6 address is not sent to Hive as ipv4
+        payload = HiveLibrary.Host.Schema().dump(host)
+        self.assertIsNone(payload.get("ipv4"))
+        self.assertEqual(payload["hostnames"][0]["hostname"], "2001:db8::1")
+
+        host = hive_nuclei._make_hive_host(
+            make_data(address="server.ispa.cnr.it", ip=ip_address("2001:db8::1"))
+        )
+        self.assertIsNone(host.ip)
+        self.assertEqual([name.hostname for name in host.names], ["2001:db8::1"])
+        self.assertEqual(
+            host.ports[0].records[0].name,
+            "[info] apache-version-detect: http://server.ispa.cnr.it:80/",
+        )
+
+    # Get keys of host, name and port records
+    def test02_get_record_keys(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        host: HiveLibrary.Host = hive_nuclei._make_hive_host(make_data())
+        host.names = [HiveLibrary.Host.Name(hostname="server.ispa.cnr.it")]
+        record_name: str = "[info] apache-version-detect: http://150.145.88.94:80/"
+        self.assertEqual(
+            HiveNuclei._get_record_keys(host),
+            {
+                ("150.145.88.94", 80, record_name),
+                ("server.ispa.cnr.it", 80, record_name),
+            },
+        )
+
+    # Skip records which exist in Hive project or are uploaded in this run
+    def test03_skip_existing(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(skip_existing=True)
+        other_project_id: UUID = uuid4()
+        hive_nuclei.hive_api.get_hosts.side_effect = lambda project_id: (
+            [hive_nuclei._make_hive_host(make_data())]
+            if project_id == hive_nuclei.project_id
+            else None
+        )
+
+        # Existing port record is skipped
+        existing: NucleiData = make_data()
+        self.assertIsNone(
+            hive_nuclei._create_hive_host(
+                project_id, hive_nuclei._make_hive_host(existing), existing
+            )
+        )
+        hive_nuclei.hive_api.create_host.assert_not_called()
+
+        # New record is uploaded, duplicate of it in the same run is skipped
+        new: NucleiData = make_data(port=443)
+        self.assertIsNotNone(
+            hive_nuclei._create_hive_host(
+                project_id, hive_nuclei._make_hive_host(new), new
+            )
+        )
+        self.assertIsNone(
+            hive_nuclei._create_hive_host(
+                project_id, hive_nuclei._make_hive_host(new), new
+            )
+        )
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 1)
+
+        # Record existing in other project is uploaded to this project
+        self.assertIsNotNone(
+            hive_nuclei._create_hive_host(
+                other_project_id, hive_nuclei._make_hive_host(existing), existing
+            )
+        )
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 2)
+
+        # Hosts are requested once per project
+        self.assertEqual(
+            [
+                call.kwargs["project_id"]
+                for call in hive_nuclei.hive_api.get_hosts.call_args_list
+            ],
+            [project_id, other_project_id],
+        )
+
+    # Records are not skipped if skip_existing is not set
+    def test04_not_skip_existing(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        data: NucleiData = make_data()
+        for _ in range(2):
+            self.assertIsNotNone(
+                hive_nuclei._create_hive_host(
+                    project_id, hive_nuclei._make_hive_host(data), data
+                )
+            )
+        hive_nuclei.hive_api.get_hosts.assert_not_called()
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 2)
+
+    # Template metadata is uploaded only with the first record of template in project
+    def test05_compact_templates(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(compact_templates=True)
+        other_project_id: UUID = uuid4()
+        for target_project_id, port in [
+            (project_id, 80),
+            (project_id, 443),
+            (other_project_id, 80),
+        ]:
+            data: NucleiData = make_data(port=port)
+            self.assertIsNotNone(
+                hive_nuclei._create_hive_host(
+                    target_project_id, hive_nuclei._make_hive_host(data), data
+                )
+            )
+        hosts: List[HiveLibrary.Host] = [
+            call.kwargs["host"]
+            for call in hive_nuclei.hive_api.create_host.call_args_list
+        ]
+        first: Dict[str, object] = get_record_children(hosts[0])
+        self.assertEqual(first["Template"], "apache-version-detect")
+        self.assertEqual(first["Tags"], "tech,apache")
+        self.assertEqual(first["Reference"], "https://httpd.apache.org/")
+        self.assertEqual(first["Description"], "Apache version detection")
+        # Later record contains template id and fields of the finding only
+        later: Dict[str, object] = get_record_children(hosts[1])
+        self.assertEqual(later["Template"], "apache-version-detect")
+        self.assertEqual(later["Matched"], "http://150.145.88.94:443/")
+        for name in ["Tags", "Reference", "Description"]:
+            self.assertNotIn(name, later)
+        # Metadata is uploaded once per project
+        self.assertIn("Description", get_record_children(hosts[2]))
+        # Host made by parser is not changed
+        self.assertIn(
+            "Description", get_record_children(hive_nuclei._make_hive_host(make_data()))
+        )
+
+    # Template metadata is uploaded again if the first upload is failed
+    def test06_compact_templates_failed_upload(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(compact_templates=True)
+        hive_nuclei.hive_api.create_host.side_effect = [None, uuid4(), uuid4()]
+        for port in [80, 443, 8080]:
+            data: NucleiData = make_data(port=port)
+            hive_nuclei._create_hive_host(
+                project_id, hive_nuclei._make_hive_host(data), data
+            )
+        hosts: List[HiveLibrary.Host] = [
+            call.kwargs["host"]
+            for call in hive_nuclei.hive_api.create_host.call_args_list
+        ]
+        self.assertEqual(
+            ["Description" in get_record_children(host) for host in hosts],
+            [True, True, False],
+        )
+
+    # Templates which metadata exists in Hive project are not uploaded again
+    def test07_compact_templates_existing(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(
+            compact_templates=True, skip_existing=True
+        )
+        hive_nuclei.hive_api.get_hosts.return_value = [
+            hive_nuclei._make_hive_host(make_data(address="10.0.0.1"))
+        ]
+        for template_id in ["apache-version-detect", "tech-detect"]:
+            data: NucleiData = make_data(template_id=template_id)
+            self.assertIsNotNone(
+                hive_nuclei._create_hive_host(
+                    project_id, hive_nuclei._make_hive_host(data), data
+                )
+            )
+        hosts: List[HiveLibrary.Host] = [
+            call.kwargs["host"]
+            for call in hive_nuclei.hive_api.create_host.call_args_list
+        ]
+        self.assertEqual(
+            [
+                (children["Template"], "Description" in children)
+                for children in map(get_record_children, hosts)
+            ],
+            [("apache-version-detect", False), ("tech-detect", True)],
+        )
+        hive_nuclei.hive_api.get_hosts.assert_called_once()
+
+    # Parse project route rules
+    def test08_project_route_from_string(self):
+        route: ProjectRoute = ProjectRoute.from_string(
+            f"{project_id}:10.0.0.0/8, 192.168.1.1,2001:db8::/32,.Corp.COM,,server.example.com."
+        )
+        self.assertEqual(route.project_id, project_id)
+        self.assertEqual(
+            route.networks,
+            [
+                ip_network("10.0.0.0/8"),
+                ip_network("192.168.1.1/32"),
+                ip_network("2001:db8::/32"),
+            ],
+        )
+        self.assertEqual(route.hostname_suffixes, ["corp.com", "server.example.com"])
+        # Host bits of network are ignored
+        self.assertEqual(
+            ProjectRoute.from_string(f"{project_id}:10.1.2.3/8").networks,
+            [ip_network("10.0.0.0/8")],
+        )
+        for route_string in [
+            f"{project_id}",
+            f"{project_id}:",
+            f"{project_id}: , ",
+            "project:10.0.0.0/8",
+            ":10.0.0.0/8",
+        ]:
+            with self.assertRaises(ValueError):
+                ProjectRoute.from_string(route_string)
+
+    # Match host ip address by networks and host names by suffixes
+    def test09_project_route_match(self):
+        route: ProjectRoute = ProjectRoute.from_string(
+            f"{project_id}:10.0.0.0/8,2001:db8::/32,corp.com"
+        )
+        self.assertTrue(route.match(ip=ip_address("10.255.0.1"), hostnames=[]))
+        self.assertFalse(route.match(ip=ip_address("11.0.0.1"), hostnames=[]))
+        self.assertTrue(route.match(ip=ip_address("2001:db8::1"), hostnames=[]))
+        self.assertFalse(route.match(ip=ip_address("2001:db9::1"), hostnames=[]))
+        # IPv4 address does not match IPv6 network
+        self.assertFalse(route.match(ip=ip_address("::ffff:10.0.0.1"), hostnames=[]))
+        self.assertTrue(route.match(ip=None, hostnames=["corp.com"]))
+        self.assertTrue(route.match(ip=None, hostnames=["WWW.Corp.com"]))
+        self.assertFalse(route.match(ip=None, hostnames=["evilcorp.com"]))
+        self.assertFalse(route.match(ip=None, hostnames=["corp.com.evil.net"]))
+        self.assertTrue(
+            route.match(
+                ip=ip_address("11.0.0.1"), hostnames=["example.com", "a.corp.com"]
+            )
+        )
+        self.assertFalse(route.match(ip=None, hostnames=[]))
+
+    # Route Hive hosts to projects, default project is used if no route matches
+    def test10_route_hive_host(self):
+        internal_project_id: UUID = uuid4()
+        customer_project_id: UUID = uuid4()
+        hive_nuclei: HiveNuclei = make_hive_nuclei(
+            routes=[
+                ProjectRoute.from_string(f"{internal_project_id}:10.0.0.0/8,fd00::/8"),
+                ProjectRoute.from_string(f"{customer_project_id}:.customer.com"),
+            ]
+        )
+
+        def route(data: NucleiData) -> List[UUID]:
+            return hive_nuclei._route_hive_host(data, hive_nuclei._make_hive_host(data))
+
+        self.assertEqual(route(make_data(address="10.1.2.3")), [internal_project_id])
+        self.assertEqual(route(make_data(address="fd00::1")), [internal_project_id])
+        self.assertEqual(
+            route(make_data(address="www.customer.com")), [customer_project_id]
+        )
+        self.assertEqual(route(make_data()), [project_id])
+
+        # Host matches several routes by ip address and host url
+        data: NucleiData = make_data(address="10.1.2.3")
+        data.host = "https://app.customer.com/login"
+        self.assertEqual(route(data), [internal_project_id, customer_project_id])
+
+        # Malformed host url is skipped
+        data = make_data(address="www.customer.com")
+        data.host = "http://[::1/"
+        self.assertEqual(route(data), [customer_project_id])
+        data = make_data()
+        data.host = "http://[::1/"
+        self.assertEqual(route(data), [project_id])
+        self.assertEqual(hive_nuclei.not_routed, 0)
+
+    # Host which does not match any route is skipped and counted if default project is not set
+    def test11_route_hive_host_not_routed(self):
+        internal_project_id: UUID = uuid4()
+        hive_nuclei: HiveNuclei = make_hive_nuclei(
+            routes=[ProjectRoute.from_string(f"{internal_project_id}:10.0.0.0/8")]
+        )
+        hive_nuclei.project_id = None
+        results = list(
+            hive_nuclei._upload_nuclei_stream(
+                [[make_data(address="10.1.2.3"), make_data(), make_data(port=443)]]
+            )
+        )
+        self.assertEqual([data.address for data, _, _ in results], ["10.1.2.3"])
+        self.assertEqual(
+            [
+                call.kwargs["project_id"]
+                for call in hive_nuclei.hive_api.create_host.call_args_list
+            ],
+            [internal_project_id],
+        )
+        self.assertEqual(hive_nuclei.not_routed, 2)
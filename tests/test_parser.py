@@ -0,0 +1,580 @@
+# Description
+"""
+Differential tests and throughput harness for Hive Nuclei connector parsers
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+
+Current parsers are compared with straightforward reference parsers on recorded and synthesized
+nuclei outputs, every faster parse path must return the same NucleiData objects as reference parsers.
+Environment variables:
+NUCLEI_CORPUS - recorded nuclei output files separated by os.pathsep, files with .json extension or
+                with json first line are parsed as json output, example: /tmp/nuclei.json:/tmp/nuclei.txt
+NUCLEI_CORPUS_SIZE - number of synthesized lines, example: 20000
+NUCLEI_CORPUS_SEED - synthesized corpus random seed, example: 1
+NUCLEI_PARSER_REPEATS - number of timed runs, the best run is reported, example: 3
+NUCLEI_PARSER_MIN_RATIO - min ratio of current to reference lines per second, example: 0.8
+NUCLEI_PARSER_MIN_LINES - min current lines per second, 0 disables check, example: 50000
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from copy import deepcopy
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from ipaddress import IPv4Address, IPv6Address, ip_address
+from json import dumps, loads, JSONDecodeError
+from os import environ, pathsep
+from os.path import dirname, join, abspath
+from random import Random
+from re import compile, search, finditer, MULTILINE
+from time import perf_counter
+from typing import Optional, List, Dict, Callable
+from urllib.parse import urlparse, ParseResult
+from uuid import UUID
+from marshmallow import fields, EXCLUDE
+from marshmallow.exceptions import ValidationError
+from hive_nuclei import HiveNuclei, NucleiData
+from hive_nuclei.target import DEFAULT_PORTS, TargetNormalizer
+from hive_nuclei.timestamp import _decode_second, get_timezone
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Global variables
+tests_directory: str = dirname(abspath(__file__))
+console_output_file: str = join(tests_directory, "nuclei_console_output.txt")
+json_output_file: str = join(tests_directory, "nuclei_json_output.txt")
+corpus_files: List[str] = [
+    file_name
+    for file_name in environ.get("NUCLEI_CORPUS", "").split(pathsep)
+    if file_name != ""
+]
+corpus_size: int = int(environ.get("NUCLEI_CORPUS_SIZE", "10000"))
+corpus_seed: int = int(environ.get("NUCLEI_CORPUS_SEED", "1"))
+parser_repeats: int = int(environ.get("NUCLEI_PARSER_REPEATS", "3"))
+parser_min_ratio: float = float(environ.get("NUCLEI_PARSER_MIN_RATIO", "0.8"))
+parser_min_lines: float = float(environ.get("NUCLEI_PARSER_MIN_LINES", "0"))
+
+SEVERITIES: List[str] = ["info", "low", "medium", "high", "critical", "unknown"]
+TYPES: List[str] = ["http", "network", "dns", "file", "ssl", "headless", "websocket"]
+TEMPLATE_IDS: List[str] = [
+    "apache-version-detect",
+    "tech-detect:nginx",
+    "CVE-2021-44228",
+    "ssh-auth-methods",
+    "dns-saas-service-detection",
+    "weak_template_id",
+]
+HOSTNAMES: List[str] = ["server.ispa.cnr.it", "app.corp.test.com", "localhost"]
+IPV4_ADDRESSES: List[str] = ["150.145.88.94", "10.0.0.1", "192.168.1.254"]
+IPV6_ADDRESSES: List[str] = ["2001:db8::1", "::1", "fe80::1ff:fe23:4567:890a"]
+EXTRACTED: List[str] = [
+    "",
+    " [Apache/2.4.7 (Ubuntu)]",
+    " [publickey,password]",
+    " []",
+    ' ["nginx","1.19"]',
+]
+TIMESTAMP_OFFSETS: List[str] = ["+03:00", "Z", "-05:30", "+0000", ""]
+TIMESTAMP_FRACTIONS: List[str] = ["", ".5", ".577", ".577122", ".577122123"]
+
+
+class ReferenceParser:
+    """
+    Straightforward nuclei output parsers, reference for faster parse paths,
+    intended changes of parsed values are applied: default ports of all known schemes,
+    IPv6 addresses, bare IP address targets, invalid url ports and not set matched field
+    """
+
+    class Schema(NucleiData.Schema):
+        date = fields.DateTime(missing=None, data_key="timestamp")
+
+    @staticmethod
+    def parse_nuclei_matched(data_list: List[NucleiData]) -> List[NucleiData]:
+        for data in data_list:
+            matched: Optional[str] = data.matched
+            data.scheme = data.type
+            if matched is None:
+                if isinstance(data.ip, (IPv4Address, IPv6Address)):
+                    data.address = str(data.ip)
+                continue
+            extracted_search = search(
+                r"^(?P<matched>.*) \[(?P<extracted>.*)\]$", matched
+            )
+            if extracted_search:
+                data.matched = str(extracted_search.group("matched"))
+                data.extracted_results = [str(extracted_search.group("extracted"))]
+                matched = data.matched
+            try:
+                urlparse_result: ParseResult = urlparse(matched)
+                hostname: Optional[str] = urlparse_result.hostname
+            except ValueError:
+                hostname = None
+            if hostname is not None:
+                data.scheme = urlparse_result.scheme
+                data.address = hostname
+                try:
+                    port: Optional[int] = urlparse_result.port
+                    if port is None:
+                        port = DEFAULT_PORTS.get(urlparse_result.scheme)
+                except ValueError:
+                    port = None
+                if port is not None:
+                    data.port = port
+            else:
+                try:
+                    data.address = str(ip_address(matched))
+                except ValueError:
+                    matched_search = search(
+                        r"^(?P<address>[0-9a-zA-Z.-_:]{3,64}):"
+                        r"(?P<port>[0-9]{1,4}|[1-5][0-9]{4}|6[0-4][0-9]{3}|65[0-4][0-9]{2}|655[0-2][0-9]|6553[0-5])$",
+                        matched,
+                    )
+                    if matched_search:
+                        data.address = str(matched_search.group("address"))
+                        if data.address.startswith("[") and data.address.endswith("]"):
+                            data.address = data.address[1:-1]
+                        data.port = int(matched_search.group("port"))
+            if isinstance(data.ip, (IPv4Address, IPv6Address)):
+                data.address = str(data.ip)
+        return data_list
+
+    @staticmethod
+    def parse_nuclei_console_output(lines: str) -> List[NucleiData]:
+        results: List[NucleiData] = list()
+        ansi_escape = compile(r"(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]")
+        ansi_escaped_lines = ansi_escape.sub("", lines)
+        nuclei_output_regex = (
+            r"^\[(?P<date>\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)\] "
+            r"\[(?P<template_id>[a-zA-Z0-9-:]{3,32})\] "
+            r"\[(?P<type>[a-zA-Z0-9-:]{2,16})\] "
+            r"\[(?P<severity>(info|low|medium|high))\] "
+            r"(?P<matched>.*)$"
+        )
+        for match in finditer(nuclei_output_regex, ansi_escaped_lines, MULTILINE):
+            results.append(
+                NucleiData(
+                    date=datetime.strptime(match.group("date"), "%Y-%m-%d %H:%M:%S"),
+                    template_id=str(match.group("template_id")),
+                    type=str(match.group("type")),
+                    severity=str(match.group("severity")),
+                    matched=str(match.group("matched")),
+                )
+            )
+        return ReferenceParser.parse_nuclei_matched(data_list=results)
+
+    @staticmethod
+    def parse_nuclei_json_output(lines: str) -> List[NucleiData]:
+        results: List[NucleiData] = list()
+        for line in lines.split("\n"):
+            try:
+                nuclei_data_dict: Dict = loads(line)
+                nuclei_data: NucleiData = ReferenceParser.Schema(unknown=EXCLUDE).load(
+                    nuclei_data_dict
+                )
+                results.append(nuclei_data)
+            except JSONDecodeError:
+                continue
+            except ValidationError:
+                continue
+        return ReferenceParser.parse_nuclei_matched(data_list=results)
+
+
+@dataclass
+class Corpus:
+    name: str
+    console_lines: List[str] = field(default_factory=list)
+    json_lines: List[str] = field(default_factory=list)
+
+    @property
+    def console_output(self) -> str:
+        return "\n".join(self.console_lines)
+
+    @property
+    def json_output(self) -> str:
+        return "\n".join(self.json_lines)
+
+
+@dataclass
+class Throughput:
+    lines: int
+    size: int
+    seconds: float
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.lines_per_second:12.0f} lines/s "
+            f"{self.bytes_per_second / 1048576:8.2f} MB/s"
+        )
+
+
+def make_matched(random: Random) -> str:
+    """
+    Make random nuclei matched field
+    :param random: Random object, example: Random(1)
+    :return: Matched field, example: 'http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]'
+    """
+    hostname: str = random.choice(HOSTNAMES)
+    ipv4: str = random.choice(IPV4_ADDRESSES)
+    ipv6: str = random.choice(IPV6_ADDRESSES)
+    port: int = random.choice([22, 80, 443, 3306, 8080, 65535])
+    scheme: str = random.choice(list(DEFAULT_PORTS) + ["unknown"])
+    matched: str = random.choice(
+        [
+            f"http://{hostname}/",
+            f"https://{hostname}:{port}/login?next=/admin",
+            f"ftp://{ipv4}/",
+            f"{scheme}://{hostname}",
+            f"{scheme}://{ipv4}:{port}",
+            f"http://[{ipv6}]:{port}/",
+            f"{hostname}:{port}",
+            f"{ipv4}:{port}",
+            f"[{ipv6}]:{port}",
+            ipv4,
+            ipv6,
+            hostname,
+            "/etc/passwd",
+            f"http://{hostname}:99999/",
+            f"http://[{ipv6}/",
+        ]
+    )
+    return matched + random.choice(EXTRACTED)
+
+
+def make_console_line(random: Random, date: datetime) -> str:
+    """
+    Make random nuclei console output line
+    :param random: Random object, example: Random(1)
+    :param date: Finding date, example: datetime(2021, 6, 7, 12, 54, 47)
+    :return: Console output line, example:
+    '[2021-06-07 12:54:47] [apache-version-detect] [http] [info] http://server.ispa.cnr.it/ [Apache/2.4.7 (Ubuntu)]'
+    """
+    parts: List[str] = [
+        date.strftime("%Y-%m-%d %H:%M:%S"),
+        random.choice(TEMPLATE_IDS),
+        random.choice(TYPES),
+        random.choice(SEVERITIES),
+    ]
+    if random.random() < 0.5:
+        colors: List[str] = ["36", "92", "94", "34"]
+        parts = [f"\x1b[{color}m{part}\x1b[0m" for color, part in zip(colors, parts)]
+    line: str = " ".join(f"[{part}]" for part in parts) + " " + make_matched(random)
+    return line + random.choice(["", "", "", "\r"])
+
+
+def make_json_line(random: Random, date: datetime) -> str:
+    """
+    Make random nuclei json output line
+    :param random: Random object, example: Random(1)
+    :param date: Finding date, example: datetime(2021, 6, 7, 12, 57, 27)
+    :return: Json output line, example:
+    '{"templateID": "apache-version-detect", "info": {"severity": "info", ...}, "matched": "http://server.ispa.cnr.it/", ...}'
+    """
+    info: Dict = {
+        "name": "Apache Version",
+        "author": "philippedelteil",
+        "severity": random.choice(SEVERITIES),
+    }
+    if random.random() < 0.5:
+        info["tags"] = "tech,apache"
+        info["reference"] = "http://reference.com/reference"
+        info["description"] = (
+            "Some Apache servers have the version on the response header"
+        )
+    data: Dict = {
+        "type": random.choice(TYPES),
+        "host": f"http://{random.choice(HOSTNAMES)}/",
+    }
+    if random.random() < 0.8:
+        data.update({"templateID": random.choice(TEMPLATE_IDS), "info": info})
+    else:
+        # Nuclei v2.3 and earlier json output without info object
+        data.update({"template": random.choice(TEMPLATE_IDS), **info})
+    if random.random() < 0.95:
+        data["matched"] = make_matched(random)
+    extracted_results: Optional[List[str]] = random.choice(
+        [None, None, [], ["Apache/2.4.7 (Ubuntu)"], ["publickey", "password"]]
+    )
+    if extracted_results is not None:
+        data["extracted_results"] = extracted_results
+    ip: Optional[str] = random.choice(
+        [None, random.choice(IPV4_ADDRESSES), random.choice(IPV6_ADDRESSES), "not-ip"]
+    )
+    if ip is not None:
+        data["ip"] = ip
+    if random.random() < 0.98:
+        data["timestamp"] = (
+            date.strftime("%Y-%m-%dT%H:%M:%S")
+            + random.choice(TIMESTAMP_FRACTIONS)
+            + random.choice(TIMESTAMP_OFFSETS)
+        )
+    else:
+        data["timestamp"] = "yesterday"
+    return dumps(data)
+
+
+def make_corpus(size: int, seed: int) -> Corpus:
+    """
+    Make synthesized nuclei outputs with all severities, protocol types, target and extracted results shapes
+    :param size: Number of lines of each output, example: 10000
+    :param seed: Random seed, example: 1
+    :return: Corpus object
+    """
+    random: Random = Random(seed)
+    corpus: Corpus = Corpus(name=f"synthesized (seed {seed})")
+    date: datetime = datetime(2021, 6, 7, 12, 54, 47)
+    noise: List[str] = ["", "[INF] Using 104 rules (104 templates, 0 workflows)"]
+    for _ in range(size):
+        # Consecutive findings usually share the same second
+        date += timedelta(seconds=random.choice([0, 0, 0, 1, 61]))
+        if random.random() < 0.02:
+            corpus.console_lines.append(random.choice(noise))
+            corpus.json_lines.append(random.choice(noise + ['{"templateID":', "[]"]))
+            continue
+        corpus.console_lines.append(make_console_line(random, date))
+        corpus.json_lines.append(make_json_line(random, date))
+    return corpus
+
+
+def read_corpus(file_names: List[str]) -> Corpus:
+    """
+    Read recorded nuclei outputs
+    :param file_names: Nuclei output files, example: ['nuclei_console_output.txt', 'nuclei_json_output.txt']
+    :return: Corpus object
+    """
+    corpus: Corpus = Corpus(name="recorded")
+    for file_name in file_names:
+        with open(file_name, "r") as nuclei_output_file:
+            lines: List[str] = nuclei_output_file.read().split("\n")
+        if file_name.endswith(".json") or lines[0].lstrip().startswith("{"):
+            corpus.json_lines.extend(lines)
+        else:
+            corpus.console_lines.extend(lines)
+    return corpus
+
+
+def measure(
+    parse: Callable[[str], List[NucleiData]],
+    lines: List[str],
+    setup: Optional[Callable[[], None]] = None,
+) -> Throughput:
+    """
+    Measure parser throughput, the best of parser_repeats runs is returned
+    :param parse: Parser function, example: ReferenceParser.parse_nuclei_json_output
+    :param lines: Nuclei output lines, example: ['{"templateID":"apache-version-detect", ...}']
+    :param setup: Function called before every run, not timed, example: lambda: print('run')
+    :return: Throughput object
+    """
+    output: str = "\n".join(lines)
+    seconds: float = float("inf")
+    for _ in range(parser_repeats):
+        # Timestamps and targets caches are cleared, every run decodes corpus from scratch
+        _decode_second.cache_clear()
+        get_timezone.cache_clear()
+        if setup is not None:
+            setup()
+        start: float = perf_counter()
+        parse(output)
+        seconds = min(seconds, perf_counter() - start)
+    return Throughput(
+        lines=len(lines), size=len(output.encode("utf-8")), seconds=seconds
+    )
+
+
+# Class ParserTest
+class ParserTest(TestCase):
+    hive_nuclei: Optional[HiveNuclei] = None
+    corpora: List[Corpus] = list()
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Parsers do not use Hive server
+        with patch("hive_nuclei.HiveRestApi"):
+            cls.hive_nuclei = HiveNuclei(
+                server="http://127.0.0.1",
+                project_id=UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e"),
+            )
+        cls.corpora = [
+            read_corpus([console_output_file, json_output_file] + corpus_files),
+            make_corpus(size=corpus_size, seed=corpus_seed),
+        ]
+
+    def assertParsedEqual(
+        self, name: str, reference: List[NucleiData], current: List[NucleiData]
+    ) -> None:
+        failures: List[str] = [
+            f"line {index}:\n  reference: {expected!r}\n  current:   {actual!r}"
+            for index, (expected, actual) in enumerate(zip(reference, current))
+            if repr(expected) != repr(actual)
+        ]
+        self.assertEqual(
+            len(reference), len(current), f"{name}: number of parsed lines"
+        )
+        self.assertEqual(
+            len(failures),
+            0,
+            f"{name}: {len(failures)} equivalence failures, first failures:\n"
+            + "\n".join(failures[:5]),
+        )
+
+    def assertThroughput(
+        self,
+        name: str,
+        reference_parse: Callable[[str], List[NucleiData]],
+        current_parse: Callable[[str], List[NucleiData]],
+        lines: List[str],
+    ) -> None:
+        reference: Throughput = measure(reference_parse, lines)
+        current: Throughput = measure(current_parse, lines, setup=self.reset_normalizer)
+        ratio: float = current.lines_per_second / reference.lines_per_second
+        print(
+            f"\n{name}: {len(lines)} lines, {current.size / 1048576:.2f} MB\n"
+            f"  reference: {reference}\n"
+            f"  current:   {current} ({ratio:.2f}x)"
+        )
+        self.assertGreaterEqual(
+            ratio,
+            parser_min_ratio,
+            f"{name}: throughput regressed to {ratio:.2f}x of reference parser",
+        )
+        self.assertGreaterEqual(
+            current.lines_per_second,
+            parser_min_lines,
+            f"{name}: throughput regressed to {current.lines_per_second:.0f} lines/s",
+        )
+
+    def reset_normalizer(self) -> None:
+        self.hive_nuclei.normalizer = TargetNormalizer()
+
+    def setUp(self) -> None:
+        # Every test starts with empty targets cache
+        self.reset_normalizer()
+
+    # Parse matched field
+    def test01_parse_matched(self):
+        random: Random = Random(corpus_seed)
+        data_list: List[NucleiData] = list()
+        for index in range(corpus_size):
+            ip: Optional[str] = random.choice(
+                [None, random.choice(IPV4_ADDRESSES), random.choice(IPV6_ADDRESSES)]
+            )
+            data_list.append(
+                NucleiData(
+                    type=random.choice(TYPES),
+                    ip=ip_address(ip) if ip is not None else None,
+                    matched=make_matched(random) if index % 50 != 0 else None,
+                )
+            )
+        self.assertParsedEqual(
+            "matched",
+            ReferenceParser.parse_nuclei_matched(deepcopy(data_list)),
+            HiveNuclei._parse_nuclei_matched(deepcopy(data_list)),
+        )
+
+    # Parse console output
+    def test02_parse_console_output(self):
+        for corpus in self.corpora:
+            reference: List[NucleiData] = ReferenceParser.parse_nuclei_console_output(
+                corpus.console_output
+            )
+            self.assertGreater(len(reference), 0)
+            self.assertParsedEqual(
+                f"{corpus.name} console output",
+                reference,
+                self.hive_nuclei._parse_nuclei_console_output(corpus.console_output),
+            )
+
+    # Parse json output
+    def test03_parse_json_output(self):
+        for corpus in self.corpora:
+            reference: List[NucleiData] = ReferenceParser.parse_nuclei_json_output(
+                corpus.json_output
+            )
+            self.assertGreater(len(reference), 0)
+            self.assertParsedEqual(
+                f"{corpus.name} json output",
+                reference,
+                self.hive_nuclei._parse_nuclei_json_output(corpus.json_output),
+            )
+
+    # Console output parser throughput
+    def test04_console_output_throughput(self):
+        lines: List[str] = [
+            line for corpus in self.corpora for line in corpus.console_lines
+        ]
+        self.assertThroughput(
+            "console output",
+            ReferenceParser.parse_nuclei_console_output,
+            self.hive_nuclei._parse_nuclei_console_output,
+            lines,
+        )
+
+    # Json output parser throughput
+    def test05_json_output_throughput(self):
+        lines: List[str] = [
+            line for corpus in self.corpora for line in corpus.json_lines
+        ]
+        self.assertThroughput(
+            "json output",
+            ReferenceParser.parse_nuclei_json_output,
+            self.hive_nuclei._parse_nuclei_json_output,
+            lines,
+        )
+
+    # Columnar batch is equal to parsed objects and is not slower to read
+    def test06_read_nuclei_batch(self):
+        for json_output in [False, True]:
+            lines: List[str] = [
+                line
+                for corpus in self.corpora
+                for line in (corpus.json_lines if json_output else corpus.console_lines)
+            ]
+            if json_output:
+                parse_objects = self.hive_nuclei._parse_nuclei_json_output
+            else:
+                parse_objects = self.hive_nuclei._parse_nuclei_console_output
+            self.assertParsedEqual(
+                f"batch json output: {json_output}",
+                parse_objects("\n".join(lines)),
+                self.hive_nuclei.read_nuclei_batch(
+                    lines, json_output=json_output
+                ).to_data(),
+            )
+            objects: Throughput = measure(
+                parse_objects, lines, setup=self.reset_normalizer
+            )
+            batch: Throughput = measure(
+                lambda output: self.hive_nuclei.read_nuclei_batch(
+                    output, json_output=json_output
+                ),
+                lines,
+                setup=self.reset_normalizer,
+            )
+            ratio: float = batch.lines_per_second / objects.lines_per_second
+            print(
+                f"\nbatch json output: {json_output}: {len(lines)} lines\n"
+                f"  objects: {objects}\n"
+                f"  batch:   {batch} ({ratio:.2f}x)"
+            )
+            self.assertGreaterEqual(
+                ratio,
+                parser_min_ratio,
+                f"batch json output: {json_output}: throughput is {ratio:.2f}x of objects",
+            )
@@ -0,0 +1,144 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector upload pipeline
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from datetime import datetime
+from threading import Event, Thread, enumerate as enumerate_threads, main_thread
+from time import monotonic, sleep
+from typing import Iterator, List
+from uuid import UUID, uuid4
+from hive_library import HiveLibrary
+from hive_library.enum import TaskStates
+from hive_nuclei import HiveNuclei, NucleiData, ImportStatus
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+def make_hive_nuclei(**kwargs) -> HiveNuclei:
+    with patch("hive_nuclei.HiveRestApi"):
+        hive_nuclei: HiveNuclei = HiveNuclei(
+            server="http://127.0.0.1",
+            project_id=UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e"),
+            **kwargs,
+        )
+    hive_nuclei.hive_api.create_host.side_effect = lambda **kwargs: uuid4()
+    return hive_nuclei
+
+
+def make_data(port: int = 80) -> NucleiData:
+    return NucleiData(
+        date=datetime(2021, 6, 7, 12, 54, 30),
+        template_id="tech-detect",
+        type="http",
+        address="150.145.88.94",
+        port=port,
+        matched=f"http://150.145.88.94:{port}/",
+    )
+
+
+# Class PipelineTest
+class PipelineTest(TestCase):
+
+    # Upload nuclei data from several iterators
+    def test01_upload_stream(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        results = list(
+            hive_nuclei._upload_nuclei_stream(
+                [[make_data(1), make_data(2)], [make_data(3)], []], workers=2
+            )
+        )
+        self.assertEqual(sorted(data.port for data, _, _ in results), [1, 2, 3])
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 3)
+
+    # Stopped pipeline does not wait for input blocked in reading, like stdin on Ctrl+C
+    def test02_interrupt_blocked_input(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        blocked: Event = Event()
+
+        def read_input() -> Iterator[NucleiData]:
+            yield make_data()
+            # Never set, like readline on stdin without input
+            blocked.wait()
+
+        for workers in [1, 2]:
+            stream = hive_nuclei._upload_nuclei_stream([read_input()], workers=workers)
+            self.assertEqual(next(stream)[0].port, 80)
+            start: float = monotonic()
+            stream.close()
+            self.assertLess(monotonic() - start, 5.0)
+
+        # KeyboardInterrupt raised in consumer stops pipeline too
+        def consume() -> None:
+            try:
+                for _ in hive_nuclei._upload_nuclei_stream([read_input()]):
+                    raise KeyboardInterrupt
+            except KeyboardInterrupt:
+                pass
+
+        consumer: Thread = Thread(target=consume, daemon=True)
+        consumer.start()
+        consumer.join(timeout=5.0)
+        self.assertFalse(consumer.is_alive())
+
+        # Only daemon threads are left blocked, so interpreter can exit
+        blocked_threads: List[Thread] = [
+            thread
+            for thread in enumerate_threads()
+            if thread is not main_thread() and not thread.daemon
+        ]
+        self.assertEqual(blocked_threads, list())
+        blocked.set()
+
+    # Task statuses are polled once more at deadline
+    def test03_wait_for_tasks(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei()
+        task_id: UUID = uuid4()
+        hive_nuclei._tasks[task_id] = hive_nuclei.project_id
+        hive_nuclei.hive_api.get_task.side_effect = [
+            HiveLibrary.Task(state=TaskStates.PENDING.value),
+            HiveLibrary.Task(state=TaskStates.PENDING.value),
+            HiveLibrary.Task(state=TaskStates.SUCCESS.value),
+        ]
+        start: float = monotonic()
+        import_status: ImportStatus = hive_nuclei.wait_for_tasks(
+            timeout=0.3, poll_interval=0.2
+        )
+        self.assertLess(monotonic() - start, 1.0)
+        self.assertEqual(import_status.completed, [task_id])
+        self.assertEqual(import_status.pending, list())
+        self.assertEqual(hive_nuclei.hive_api.get_task.call_count, 3)
+
+    # Names are resolved by pool of resolve workers
+    def test04_resolve_workers(self):
+        hive_nuclei: HiveNuclei = make_hive_nuclei(resolve=True, resolve_workers=4)
+
+        def lookup_name(address) -> str:
+            sleep(0.2)
+            return f"host-{address.packed[-1]}.corp.com"
+
+        data_list: List[NucleiData] = [make_data() for _ in range(8)]
+        for index, data in enumerate(data_list):
+            data.address = f"10.0.0.{index}"
+        start: float = monotonic()
+        with patch.object(hive_nuclei.resolver, "_lookup_name", lookup_name):
+            results = list(hive_nuclei._upload_nuclei_stream([data_list]))
+        self.assertLess(monotonic() - start, 8 * 0.2)
+        self.assertEqual(
+            sorted(host.names[0].hostname for _, host, _ in results),
+            [f"host-{index}.corp.com" for index in range(8)],
+        )
@@ -0,0 +1,131 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector scope filter
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from ipaddress import ip_address, ip_network
+from uuid import UUID
+from typing import List
+from hive_nuclei import HiveNuclei, NucleiData
+from hive_nuclei.scope import NetworkTree, HostnameTrie, ScopeList, Scope
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+
+# Class ScopeTest
+class ScopeTest(TestCase):
+
+    # Match IPv4 and IPv6 networks
+    def test01_network_tree(self):
+        tree: NetworkTree = NetworkTree()
+        for network in ["10.0.0.0/8", "192.168.1.1/32", "2001:db8::/32", "0.0.0.0/32"]:
+            tree.add(ip_network(network))
+        self.assertEqual(len(tree), 4)
+        self.assertTrue(tree.match(ip_address("10.0.0.0")))
+        self.assertTrue(tree.match(ip_address("10.255.255.255")))
+        self.assertFalse(tree.match(ip_address("11.0.0.0")))
+        self.assertFalse(tree.match(ip_address("9.255.255.255")))
+        self.assertTrue(tree.match(ip_address("192.168.1.1")))
+        self.assertFalse(tree.match(ip_address("192.168.1.2")))
+        self.assertTrue(tree.match(ip_address("2001:db8::1")))
+        self.assertFalse(tree.match(ip_address("2001:db9::1")))
+        self.assertTrue(tree.match(ip_address("0.0.0.0")))
+        self.assertFalse(tree.match(ip_address("0.0.0.1")))
+        # IPv4 and IPv6 trees are separate
+        self.assertFalse(tree.match(ip_address("::a00:1")))
+
+    # Match host name suffixes on label boundaries
+    def test02_hostname_trie(self):
+        trie: HostnameTrie = HostnameTrie()
+        trie.add(".corp.com")
+        trie.add("*.test.org")
+        trie.add("server.example.com")
+        self.assertEqual(len(trie), 3)
+        self.assertTrue(trie.match("corp.com"))
+        self.assertTrue(trie.match("server.corp.com"))
+        self.assertTrue(trie.match("a.b.corp.com"))
+        self.assertTrue(trie.match("SERVER.Corp.COM."))
+        self.assertFalse(trie.match("evilcorp.com"))
+        self.assertFalse(trie.match("corp.com.evil.net"))
+        self.assertFalse(trie.match("com"))
+        self.assertTrue(trie.match("app.test.org"))
+        self.assertTrue(trie.match("server.example.com"))
+        self.assertTrue(trie.match("www.server.example.com"))
+        self.assertFalse(trie.match("example.com"))
+
+    # Parse scope list rules
+    def test03_scope_list(self):
+        scope_list: ScopeList = ScopeList(
+            [
+                "# comment",
+                "",
+                "  10.0.0.0/8  ",
+                "192.168.1.1",
+                "2001:db8::/32",
+                ".corp.com",
+            ]
+        )
+        self.assertEqual(len(scope_list), 4)
+        self.assertTrue(scope_list.match("10.1.2.3"))
+        self.assertTrue(scope_list.match(ip_address("10.1.2.3")))
+        self.assertTrue(scope_list.match("192.168.1.1"))
+        self.assertTrue(scope_list.match("[2001:db8::5]"))
+        self.assertTrue(scope_list.match("server.corp.com"))
+        self.assertFalse(scope_list.match("192.168.1.2"))
+        self.assertFalse(scope_list.match("evilcorp.com"))
+        self.assertFalse(scope_list.match("# comment"))
+
+    # Deny rules override allow rules
+    def test04_scope_contains(self):
+        scope: Scope = Scope(
+            allow=["10.0.0.0/8", ".corp.com"], deny=["10.0.0.1", ".cdn.corp.com"]
+        )
+        self.assertTrue(scope.contains([ip_address("10.1.2.3")]))
+        self.assertTrue(scope.contains([None, "", "server.corp.com"]))
+        self.assertFalse(scope.contains([ip_address("10.0.0.1"), "server.corp.com"]))
+        self.assertFalse(scope.contains(["server.corp.com", "img.cdn.corp.com"]))
+        self.assertFalse(scope.contains(["evilcorp.com", ip_address("11.0.0.1")]))
+        self.assertFalse(scope.contains([None, ""]))
+        self.assertTrue(scope.contains(["evilcorp.com", "10.2.3.4"]))
+
+        # All hosts are in scope if allow list is empty
+        scope = Scope(deny=[".cdn.corp.com"])
+        self.assertTrue(scope.contains(["example.com"]))
+        self.assertTrue(scope.contains([None]))
+        self.assertFalse(scope.contains(["cdn.corp.com"]))
+
+    # Skip and count out of scope nuclei data
+    def test05_hive_nuclei_scope(self):
+        with patch("hive_nuclei.HiveRestApi"):
+            hive_nuclei: HiveNuclei = HiveNuclei(
+                server="http://127.0.0.1",
+                project_id=UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e"),
+                scope=Scope(allow=["10.0.0.0/8"], deny=[".cdn.corp.com"]),
+            )
+        lines: str = "\n".join(
+            [
+                '{"templateID":"a","type":"http","matched":"http://10.0.0.1/"}',
+                '{"templateID":"b","type":"http","matched":"http://11.0.0.1/"}',
+                '{"templateID":"c","type":"http","host":"http://img.cdn.corp.com/",'
+                '"matched":"http://10.0.0.2/"}',
+                '{"templateID":"d","type":"http","host":"http://[::1/","matched":"http://10.0.0.3/"}',
+            ]
+        )
+        data_list: List[NucleiData] = hive_nuclei._parse_nuclei_json_output(lines)
+        self.assertEqual([data.template_id for data in data_list], ["a", "d"])
+        self.assertIsInstance(data_list[0], NucleiData)
+        self.assertEqual(hive_nuclei.out_of_scope, 2)
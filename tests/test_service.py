@@ -0,0 +1,169 @@
+# Description
+"""
+Unit tests for Hive Nuclei connector ingestion service
+Author: Vladimir Ivanov
+License: MIT
+Copyright 2021, Hive Nuclei connector
+"""
+
+# Import
+from unittest import TestCase
+from unittest.mock import patch
+from http.client import HTTPConnection
+from io import BytesIO
+from json import loads
+from os.path import exists, join
+from socket import socket, AF_UNIX
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+from typing import List, Dict
+from uuid import UUID, uuid4
+from hive_nuclei import HiveNuclei
+from hive_nuclei.service import (
+    NucleiService,
+    NucleiRequestHandler,
+    ThreadingUnixHTTPServer,
+    parse_address,
+)
+
+# Authorship information
+__author__ = "Vladimir Ivanov"
+__copyright__ = "Copyright 2021, Hive Nuclei connector"
+__credits__ = [""]
+__license__ = "MIT"
+__version__ = "0.0.2"
+__maintainer__ = "Vladimir Ivanov"
+__email__ = "ivanov.vladimir.mail@gmail.com"
+__status__ = "Development"
+
+# Global variables
+json_line: str = (
+    '{"templateID":"tech-detect","type":"http","matched":"http://server.ispa.cnr.it/",'
+    '"ip":"150.145.88.94","timestamp":"2021-06-07T12:57:27.577122+03:00"}'
+)
+
+
+def make_handler(body: bytes, headers: Dict[str, str]) -> NucleiRequestHandler:
+    # Request handler without socket, only request body is read
+    handler: NucleiRequestHandler = NucleiRequestHandler.__new__(NucleiRequestHandler)
+    handler.rfile = BytesIO(body)
+    handler.headers = headers
+    return handler
+
+
+# Class ServiceTest
+class ServiceTest(TestCase):
+
+    # Decode chunked request body
+    def test01_read_chunks(self):
+        handler: NucleiRequestHandler = make_handler(
+            b"5\r\nfirst\r\n7;name=value\r\n\nsecond\r\nA\r\n line\nlast\r\n0\r\nTrailer: 1\r\n\r\n",
+            {"Transfer-Encoding": "chunked"},
+        )
+        self.assertEqual(
+            list(handler._read_chunks()), [b"first", b"\nsecond", b" line\nlast"]
+        )
+
+        # Lines are split across chunk boundaries
+        handler = make_handler(
+            b"5\r\nfirst\r\n7;name=value\r\n\nsecond\r\nA\r\n line\nlast\r\n0\r\n\r\n",
+            {"Transfer-Encoding": "Chunked"},
+        )
+        self.assertEqual(
+            list(handler._read_lines()), ["first\n", "second line\n", "last"]
+        )
+
+    # Read request body by Content-Length
+    def test02_read_content_length(self):
+        body: bytes = b"line 1\nline 2\nnext request"
+        handler: NucleiRequestHandler = make_handler(body, {"Content-Length": "13"})
+        self.assertEqual(list(handler._read_lines()), ["line 1\n", "line 2"])
+        handler = make_handler(b"", {})
+        self.assertEqual(list(handler._read_lines()), list())
+
+        # Body shorter than Content-Length
+        handler = make_handler(b"line 1\n", {"Content-Length": "100"})
+        self.assertEqual(list(handler._read_lines()), ["line 1\n"])
+
+    # Parse service TCP address
+    def test03_parse_address(self):
+        self.assertEqual(parse_address("127.0.0.1:8090"), ("127.0.0.1", 8090))
+        self.assertEqual(parse_address("[::1]:8090"), ("::1", 8090))
+        self.assertEqual(parse_address("localhost:8090"), ("localhost", 8090))
+        for address in ["8090", ":8090", "0.0.0.0:8090", "10.0.0.1:8090", "[::]:8090"]:
+            with self.assertRaises(ValueError):
+                parse_address(address)
+        for address in ["127.0.0.1:port", "127.0.0.1:0", "127.0.0.1:65536"]:
+            with self.assertRaises(ValueError):
+                parse_address(address, allow_remote=True)
+        self.assertEqual(
+            parse_address("0.0.0.0:8090", allow_remote=True), ("0.0.0.0", 8090)
+        )
+
+    # Replace only stale Unix socket
+    def test04_unix_socket(self):
+        with TemporaryDirectory() as directory:
+            file_name: str = join(directory, "nuclei.txt")
+            with open(file_name, "w") as file:
+                file.write("keep")
+            with self.assertRaises(FileExistsError):
+                ThreadingUnixHTTPServer(file_name, NucleiRequestHandler)
+            with open(file_name, "r") as file:
+                self.assertEqual(file.read(), "keep")
+
+            socket_name: str = join(directory, "hive-nuclei.sock")
+            stale_socket: socket = socket(AF_UNIX)
+            stale_socket.bind(socket_name)
+            stale_socket.close()
+            server: ThreadingUnixHTTPServer = ThreadingUnixHTTPServer(
+                socket_name, NucleiRequestHandler
+            )
+            server.server_close()
+            self.assertTrue(exists(socket_name))
+
+    # Import nuclei output sent with chunked transfer encoding
+    def test05_serve(self):
+        with patch("hive_nuclei.HiveRestApi"):
+            hive_nuclei: HiveNuclei = HiveNuclei(
+                server="http://127.0.0.1",
+                project_id=UUID("2b10f974-3215-4a4e-9fb7-04be8ac5202e"),
+                track_tasks=False,
+            )
+        hive_nuclei.hive_api.create_host.side_effect = lambda **kwargs: uuid4()
+        # Get free TCP port
+        free_socket: socket = socket()
+        free_socket.bind(("127.0.0.1", 0))
+        port: int = free_socket.getsockname()[1]
+        free_socket.close()
+
+        service: NucleiService = NucleiService(hive_nuclei=hive_nuclei)
+        service_thread: Thread = Thread(
+            target=service.serve, kwargs={"address": f"127.0.0.1:{port}"}, daemon=True
+        )
+        service_thread.start()
+        for _ in range(1000):
+            if len(service._threads) > len(service._servers) > 0:
+                break
+            sleep(0.01)
+
+        connection: HTTPConnection = HTTPConnection("127.0.0.1", port, timeout=10)
+        chunks: List[bytes] = [json_line[:50].encode(), f"{json_line[50:]}\n".encode()]
+        connection.request("POST", "/json", body=iter(chunks), encode_chunked=True)
+        response = connection.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(loads(response.read()), {"findings": 1})
+
+        connection.request("POST", "/unknown", body=b"")
+        response = connection.getresponse()
+        self.assertEqual(response.status, 404)
+        response.read()
+        connection.close()
+
+        # Service stops after queued nuclei data is uploaded
+        service._stopped.set()
+        service_thread.join(timeout=10)
+        self.assertFalse(service_thread.is_alive())
+        self.assertIsNone(service.error)
+        self.assertEqual(service.status()["hosts"], 1)
+        self.assertEqual(hive_nuclei.hive_api.create_host.call_count, 1)